@@ -0,0 +1,173 @@
+"""Admitting late registrations into an existing schedule.
+
+An AdmissionIndex is built once from the scheduled judges. Each call to admit() then
+gives one new student a panel of JUDGES_PER_POSTER presentation judges who are free at
+the same time (if they present a poster) and two paper reviewers (if they submitted a
+paper), picking the least busy judges in the student's category, without changing any
+existing assignment.
+
+The judges of each category are kept in heaps ordered by their current load. A judge
+can be in the heaps of several categories, so an assignment through one category
+leaves their entries in the others out of date. Out of date entries are only fixed
+when they reach the top of a heap, which keeps every admission at O(log J) time
+(amortized) for J judges. Panels of more than one judge can take longer, since judges
+are popped until enough of them share a free time.
+"""
+
+import heapq
+
+from util import PresentationAssignmentError, PaperAssignmentError
+from config import CATEGORY_NUMBERS_TO_LABELS, JUDGES_PER_POSTER
+
+
+class AdmissionIndex:
+    def __init__(self, judge_roster):
+        # category -> heap of (load key, roster position, judge ID) for judges who may
+        # still be free to evaluate presentations or review papers
+        self._presentation_heaps = {}
+        self._paper_heaps = {}
+        self._judges_by_id = {}
+        for position, judge in enumerate(judge_roster):
+            self._judges_by_id[judge.judge_id] = judge
+            for category in judge.preferred_categories:
+                if judge.presentation_slots and self._free_time(judge) is not None:
+                    self._presentation_heaps.setdefault(category, []).append(
+                        (self._presentation_key(judge), position, judge.judge_id)
+                    )
+                if judge.is_paper_reviewer:
+                    self._paper_heaps.setdefault(category, []).append(
+                        (self._paper_key(judge), position, judge.judge_id)
+                    )
+        for heap in list(self._presentation_heaps.values()) + list(self._paper_heaps.values()):
+            heapq.heapify(heap)
+
+    @staticmethod
+    def _presentation_key(judge):
+        return len(judge.assigned_presentations)
+
+    @staticmethod
+    def _paper_key(judge):
+        # Same order as the conflict handling in assign_papers
+        return (len(judge.assigned_papers), len(judge.assigned_presentations))
+
+    @staticmethod
+    def _free_times(judge):
+        # Times in the judge's availability that they have not been given a presentation at yet
+        assigned_times = set(judge.assigned_times)
+        for time_index in reversed(judge.presentation_availability):
+            if time_index not in assigned_times:
+                yield time_index
+
+    def _free_time(self, judge):
+        return next(self._free_times(judge), None)
+
+    def _pop_judges(self, heap, key, count, is_free, exclude=()):
+        # Pops the count least busy judges for whom is_free(judge) holds, skipping the
+        # excluded judges. Entries are popped for good only if their judge is no
+        # longer free, so the caller has to push the chosen judges back.
+        chosen = []
+        skipped = []
+        while heap and len(chosen) < count:
+            entry = heapq.heappop(heap)
+            entry_key, position, judge_id = entry
+            judge = self._judges_by_id[judge_id]
+            if not is_free(judge):
+                continue
+            if entry_key != key(judge):
+                # Out of date, so it goes back with the judge's current load
+                heapq.heappush(heap, (key(judge), position, judge_id))
+                continue
+            if judge in exclude:
+                skipped.append(entry)
+                continue
+            chosen.append(entry)
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    def _pop_panel(self, heap, size):
+        # Pops the least busy judges who are free to evaluate presentations until size of
+        # them are free at the same time. Returns their entries and that time, or no
+        # entries if there is no such panel. Entries of judges outside the panel are
+        # pushed back, so only the panel's have to be pushed back by the caller.
+        popped = []
+        entries_by_time = {}
+        panel, panel_time = [], None
+        while not panel:
+            entries = self._pop_judges(
+                heap,
+                self._presentation_key,
+                1,
+                lambda judge: judge.presentation_slots and self._free_time(judge) is not None,
+            )
+            if not entries:
+                break
+            popped += entries
+            for time_index in self._free_times(self._judges_by_id[entries[0][2]]):
+                entries_at_time = entries_by_time.setdefault(time_index, [])
+                entries_at_time.append(entries[0])
+                if len(entries_at_time) == size:
+                    panel, panel_time = entries_at_time, time_index
+                    break
+        self._push_judges(
+            heap, self._presentation_key, [entry for entry in popped if entry not in panel]
+        )
+        return panel, panel_time
+
+    def _push_judges(self, heap, key, entries):
+        for _, position, judge_id in entries:
+            heapq.heappush(heap, (key(self._judges_by_id[judge_id]), position, judge_id))
+
+    def admit(self, student):
+        # Either every assignment that the student needs is made, or (if their category
+        # is short of judges) none are and the error names the category
+        cat = student.category
+        presentation_heap = self._presentation_heaps.get(cat, [])
+        paper_heap = self._paper_heaps.get(cat, [])
+
+        presentation_entries, presentation_time = [], None
+        if student.is_poster:
+            presentation_entries, presentation_time = self._pop_panel(
+                presentation_heap, JUDGES_PER_POSTER
+            )
+            if not presentation_entries:
+                error_message = (
+                    f"The category {CATEGORY_NUMBERS_TO_LABELS[cat]} does not have {JUDGES_PER_POSTER} judge(s) left with a common free time to evaluate the presentation of student {student.student_id}.\n"
+                    "Either assign more judges to this category or admit the student to another category.\n"
+                )
+                raise PresentationAssignmentError(error_message, category=cat)
+        panel = [self._judges_by_id[judge_id] for _, _, judge_id in presentation_entries]
+        # As in the presentation strategies, up to two presentation judges who review
+        # papers also review the student's paper
+        panel_reviewers = (
+            [judge for judge in panel if judge.is_paper_reviewer][:2] if student.is_paper else []
+        )
+
+        paper_entries = []
+        if student.is_paper:
+            needed = 2 - len(panel_reviewers)
+            paper_entries = self._pop_judges(
+                paper_heap,
+                self._paper_key,
+                needed,
+                lambda judge: True,
+                exclude=panel_reviewers,
+            )
+            if len(paper_entries) < needed:
+                self._push_judges(paper_heap, self._paper_key, paper_entries)
+                self._push_judges(presentation_heap, self._presentation_key, presentation_entries)
+                error_message = (
+                    f"The category {CATEGORY_NUMBERS_TO_LABELS[cat]} does not have enough paper reviewers to review the paper of student {student.student_id}.\n"
+                    "Either assign more paper reviewers to this category or admit the student to another category.\n"
+                )
+                raise PaperAssignmentError(error_message, category=cat)
+
+        for judge in panel:
+            judge.assign_presentation(student, presentation_time)
+            if judge in panel_reviewers:
+                judge.assign_paper(student)
+        for _, _, judge_id in paper_entries:
+            self._judges_by_id[judge_id].assign_paper(student)
+
+        self._push_judges(presentation_heap, self._presentation_key, presentation_entries)
+        self._push_judges(paper_heap, self._paper_key, paper_entries)
@@ -1,4 +1,18 @@
-"""Functions that were abandoned for the final deliverable, but may prove useful for further development."""
+"""Functions that were abandoned for the final deliverable, but may prove useful for further development.
+
+The assignment strategies here are registered by name in strategies.py, so they can
+still be chosen in config.py or on the command line and compared with benchmark.py.
+"""
+
+import math
+
+from strategies import (
+    register_presentation_strategy,
+    register_paper_strategy,
+    group_posters_by_category,
+    presentation_shortage_error,
+)
+from util import PaperAssignmentError
 
 
 def get_cat_time_judges(judge_roster, paper_reviewers):
@@ -35,6 +49,7 @@ def get_cat_time_judges(judge_roster, paper_reviewers):
     return cat_time_judges
 
 
+@register_paper_strategy("ignoring_category")
 def assign_papers_ignoring_category(judge_roster, student_roster):
     # Aggregate all students who still need papers reviewed
     students = []
@@ -48,6 +63,18 @@ def assign_papers_ignoring_category(judge_roster, student_roster):
     total_num_paper_reviewers = len(
         [judge for judge in judge_roster if judge.is_paper_reviewer]
     )
+    # Every paper needs two different reviewers
+    if students and total_num_paper_reviewers < 2:
+        error_message = (
+            "There were not enough paper reviewers to review all papers.\n"
+            "Either assign more paper reviewers or remove some students who are submitting papers.\n"
+            f"There are {len(students)} student(s) who still need paper reviewers and {total_num_paper_reviewers} "
+            "judge(s) who have volunteered to review papers, but every paper needs 2 different reviewers.\n"
+        )
+        raise PaperAssignmentError(error_message)
+    if not students:
+        return
+
     threshold = math.ceil(total_num_paper_assignments / total_num_paper_reviewers)
     # Maybe modify threshold calculations so that judges who do both poster + paper get less papers (using a lower threshold)?
 
@@ -69,13 +96,23 @@ def assign_papers_ignoring_category(judge_roster, student_roster):
     judge_index = 0
     for student in students:
         while len(student.paper_judges) < 2:
-            # if judges:
-            #     judge_index %= len(judges)
-            # else:
-            #     break
+            if not judges:
+                # Every reviewer has reached the threshold, so allow one more paper each
+                threshold += 1
+                judges = [
+                    judge
+                    for judge in judge_roster
+                    if judge.is_paper_reviewer and len(judge.assigned_papers) < threshold
+                ]
             judge_index %= len(judges)
 
             judge = judges[judge_index]
+            # The same judge cannot review a paper twice
+            if student in judge.assigned_papers:
+                if all(student in other_judge.assigned_papers for other_judge in judges):
+                    judges = []
+                judge_index += 1
+                continue
             judge.assign_paper(student)
             if len(judge.assigned_papers) >= threshold:
                 judges.remove(judge)
@@ -83,30 +120,16 @@ def assign_papers_ignoring_category(judge_roster, student_roster):
                 judge_index += 1
 
 
+@register_presentation_strategy("paired_time_slots", panel_size=2)
 def assign_presentations_old(judge_roster, student_roster):
-    # Aggregate all students by category who will be poster presenters
-    students_by_cat = {
-        cat: [
-            student
-            for student in student_roster
-            if student.is_poster and student.category == cat
-        ]
-        for cat in STUDENT_CATEGORIES.values()
-    }
-
-    category_judges = {category: [] for category in JUDGE_CATEGORIES.values()}
-    for judge in judge_roster:
-        # Filter out judges who only review papers
-        if not judge.presentation_slots:
-            continue
-        for category in judge.preferred_categories:
-            category_judges[category].append(judge)
+    students_by_cat, category_judges = group_posters_by_category(judge_roster, student_roster)
 
     judges_schedule = get_cat_time_judges(judge_roster, paper_reviewers=True)
 
     for cat in sorted(
-        judges_schedule, key=lambda category: len(category_judges[category])
+        students_by_cat, key=lambda category: len(category_judges[category])
     ):
+        judges_schedule.setdefault(cat, dict())
         availability = list(judges_schedule[cat].keys())
         availability.sort(key=lambda time_index: len(judges_schedule[cat][time_index]))
 
@@ -119,7 +142,11 @@ def assign_presentations_old(judge_roster, student_roster):
         # or there are no time slots left for the category with at least two judges
 
         assigned_yet = 0
-        while students and judges_schedule[cat]:
+        while (
+            students
+            and judges_schedule[cat]
+            and assigned_yet <= len(students_by_cat[cat])
+        ):
             for time_index in availability:
                 if time_index not in judges_schedule[cat]:
                     continue
@@ -128,6 +155,8 @@ def assign_presentations_old(judge_roster, student_roster):
                     for judge in judges_schedule[cat][time_index]
                     if len(judge.assigned_presentations) <= assigned_yet
                     and judge.presentation_slots
+                    # Judges in several categories may already be busy at this time
+                    and time_index not in judge.assigned_times
                 ]
                 judges.sort(
                     key=lambda judge: len(judge.assigned_presentations), reverse=True
@@ -146,8 +175,7 @@ def assign_presentations_old(judge_roster, student_roster):
                     del judges_schedule[cat][time_index]
             assigned_yet += 1
 
-        # Should print nothing if all students were assigned
-        # for student in students:
-        #     print(student.student_id)
-
-    # TODO: Edge cases (leftover students)
+        if students:
+            raise presentation_shortage_error(
+                cat, len(students_by_cat[cat]), len(category_judges[cat]), 2
+            )
@@ -0,0 +1,126 @@
+"""Saving and loading the schedule produced by a successful run.
+
+The schedule artifact holds only the assignments (judge IDs, student IDs, and
+presentation time indices), the number of judges per poster, and a hash of the input
+files. Together with the input files, it is enough to regenerate any of the output
+files without rerunning the assignment, and the hash makes sure that the input has not
+changed in the meantime.
+"""
+
+import hashlib
+import json
+
+from ingest import roster_files
+from util import ScheduleArtifactError
+from config import JUDGES_PER_POSTER
+
+
+ARTIFACT_VERSION = 2
+
+
+def input_hash(path):
+    # Hash of every file in the roster, in the order they are read
+    sha256 = hashlib.sha256()
+    for csv_filename in roster_files(path):
+        sha256.update(csv_filename.name.encode("utf-8") + b"\0")
+        with open(csv_filename, "rb") as csvfile:
+            for chunk in iter(lambda: csvfile.read(1 << 20), b""):
+                sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def save_schedule(artifact_filename, judge_data_path, student_data_path, judge_roster):
+    # Assignments are stored in each judge's order, along with their position in the
+    # student's list of judges so that both orders can be restored
+    presentations = []  # list of [judge ID, student ID, time index, position]
+    papers = []  # list of [judge ID, student ID, position]
+    for judge in judge_roster:
+        for student, time_index in zip(judge.assigned_presentations, judge.assigned_times):
+            presentations.append(
+                [
+                    judge.judge_id,
+                    student.student_id,
+                    time_index,
+                    student.presentation_judges.index(judge),
+                ]
+            )
+        for student in judge.assigned_papers:
+            papers.append(
+                [judge.judge_id, student.student_id, student.paper_judges.index(judge)]
+            )
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "input_hash": {
+            "judges": input_hash(judge_data_path),
+            "students": input_hash(student_data_path),
+        },
+        # Panels of another size cannot be replayed, or rendered into the output files
+        "judges_per_poster": JUDGES_PER_POSTER,
+        "presentations": presentations,
+        "papers": papers,
+    }
+    with open(artifact_filename, "w", encoding="utf-8") as artifact_file:
+        json.dump(artifact, artifact_file, separators=(",", ":"))
+
+
+def read_schedule(artifact_filename):
+    try:
+        with open(artifact_filename, encoding="utf-8") as artifact_file:
+            artifact = json.load(artifact_file)
+    except FileNotFoundError:
+        raise ScheduleArtifactError(
+            f'No saved schedule was found at "{artifact_filename}".\n'
+            "Run the scheduler normally first.\n"
+        )
+    if artifact.get("version") != ARTIFACT_VERSION:
+        raise ScheduleArtifactError(
+            f'The saved schedule at "{artifact_filename}" was made by a different version of the scheduler.\n'
+            "Run the scheduler normally to make a new one.\n"
+        )
+    if artifact["judges_per_poster"] != JUDGES_PER_POSTER:
+        raise ScheduleArtifactError(
+            f'The saved schedule at "{artifact_filename}" gives every poster {artifact["judges_per_poster"]} judge(s), but JUDGES_PER_POSTER in config.py is now {JUDGES_PER_POSTER}.\n'
+            "Either change JUDGES_PER_POSTER back or run the scheduler normally to make a new schedule.\n"
+        )
+    return artifact
+
+
+def check_input_hash(artifact, judge_data_path=None, student_data_path=None):
+    # Only the input files that are passed in are checked
+    for kind, path in (("judges", judge_data_path), ("students", student_data_path)):
+        if path is not None and input_hash(path) != artifact["input_hash"][kind]:
+            raise ScheduleArtifactError(
+                f"The input {kind[:-1]} data has changed since the saved schedule was made.\n"
+                "Run the scheduler normally to make a new schedule.\n"
+            )
+
+
+def apply_schedule(artifact, judge_roster, student_roster):
+    # Replays the saved assignments onto freshly parsed rosters
+    judges_by_id = {judge.judge_id: judge for judge in judge_roster}
+    students_by_id = {student.student_id: student for student in student_roster}
+    presentation_positions = {}
+    paper_positions = {}
+    try:
+        for judge_id, student_id, time_index, position in artifact["presentations"]:
+            judge, student = judges_by_id[judge_id], students_by_id[student_id]
+            judge.assign_presentation(student, time_index)
+            presentation_positions[(judge_id, student_id)] = position
+        for judge_id, student_id, position in artifact["papers"]:
+            judge, student = judges_by_id[judge_id], students_by_id[student_id]
+            judge.assign_paper(student)
+            paper_positions[(judge_id, student_id)] = position
+    except KeyError:
+        raise ScheduleArtifactError(
+            "The saved schedule refers to a judge or student that is not in the input data.\n"
+            "Run the scheduler normally to make a new schedule.\n"
+        )
+
+    for student in student_roster:
+        student.presentation_judges.sort(
+            key=lambda judge: presentation_positions[(judge.judge_id, student.student_id)]
+        )
+        student.paper_judges.sort(
+            key=lambda judge: paper_positions[(judge.judge_id, student.student_id)]
+        )
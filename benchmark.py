@@ -0,0 +1,454 @@
+"""Comparison of the registered assignment strategies.
+
+Every combination of a presentation strategy and a paper strategy is run on the same
+synthetic rosters, which are generated from a seed so that runs can be repeated.
+Each combination is measured on runtime, peak memory (in a separate run, since
+tracing memory slows everything down), and how evenly the workload is spread
+across the judges.
+
+It also checks the pipeline for performance regressions. Fixed, seeded roster sizes
+are run through each phase of the pipeline several times, and the median time of
+each phase is compared with the baseline in benchmark_baseline.json. Times are scaled
+by a short calibration workload, so that the baseline can be checked on a faster or
+slower machine than the one it was made on.
+
+Run this file directly to print the comparison, for example:
+
+    python benchmark.py --judges 300 --students 1000 --seed 1
+
+or to check for regressions (and to update the baseline after an intended change):
+
+    python benchmark.py --check
+    python benchmark.py --update-baseline
+"""
+
+import argparse
+import csv
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+
+# Imported through main.py so that every bundled strategy is registered
+from main import (
+    PRESENTATION_STRATEGIES,
+    PAPER_STRATEGIES,
+    assign_presentations,
+    assign_papers,
+    verify_output,
+    verify_rows,
+)
+from strategies import usable_presentation_strategies
+from ingest import (
+    load_judge_roster,
+    load_student_roster,
+    judge_from_row,
+    student_from_row,
+)
+from render import render_tables
+from ledger import reset_default_ledger
+from util import (
+    PresentationAssignmentError,
+    PaperAssignmentError,
+    OutputVerificationError,
+    index_to_datetime,
+    get_column_name_from_datetime,
+    get_time_slot_availability_string_from_datetime,
+)
+from config import (
+    JudgeColumnNames,
+    StudentColumnNames,
+    JUDGE_CATEGORIES,
+    STUDENT_CATEGORIES,
+    START_TIME,
+    END_TIME,
+)
+
+
+StrategyResult = namedtuple(
+    "StrategyResult",
+    [
+        "presentation_strategy",  # str
+        "paper_strategy",  # str
+        "error",  # str, the first line of the assignment or verification error, or None if feasible
+        "seconds",  # float, time taken by both strategies
+        "peak_memory",  # int, peak bytes allocated by both strategies
+        "max_load",  # int, most presentations and papers assigned to one judge
+        "load_spread",  # int, difference between the busiest and least busy judge
+        "load_deviation",  # float, standard deviation of the judges' workload
+    ],
+)
+
+PhaseRegression = namedtuple(
+    "PhaseRegression",
+    [
+        "size",  # str, name of the roster size
+        "phase",  # str
+        "baseline_seconds",  # float, median time in the baseline
+        "seconds",  # float, median time in this run
+    ],
+)
+
+PARTICIPATION_TYPES = ("Oral/Paper", "Poster", "Oral/Paper, Poster")
+
+# Roster sizes (judges, students) and seed used by the regression check. Changing
+# them makes the baseline meaningless, so update the baseline at the same time.
+REGRESSION_SIZES = ((100, 300), (1000, 3000))
+REGRESSION_SEED = 0
+PHASES = ("parse", "assign_presentations", "assign_papers", "verify_output", "render")
+BASELINE_FILE = Path(__file__).parent / "benchmark_baseline.json"
+
+
+def generate_rows(num_judges, num_students, seed=0, max_hours=4):
+    # Input rows in the same format as the form responses, keyed by the column names in config.py
+    rng = random.Random(seed)
+    judge_categories = list(JUDGE_CATEGORIES)
+    student_categories = list(STUDENT_CATEGORIES)
+    num_indices = len(JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES) * (
+        END_TIME - START_TIME
+    )
+
+    judge_rows = []
+    for number in range(num_judges):
+        time_slots = {
+            column_name: [] for column_name in JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES
+        }
+        for index in sorted(rng.sample(range(num_indices), rng.randint(0, max_hours))):
+            index_dt = index_to_datetime(index)
+            time_slots[get_column_name_from_datetime(index_dt)].append(
+                get_time_slot_availability_string_from_datetime(index_dt)
+            )
+        row = {
+            JudgeColumnNames.FIRST_NAME: f"Judge{number}",
+            JudgeColumnNames.LAST_NAME: "Benchmark",
+            JudgeColumnNames.EMAIL: f"judge{number}@example.org",
+            JudgeColumnNames.PHONE: f"555-{number:07d}",
+            JudgeColumnNames.PREFERRED_CATEGORIES: ", ".join(
+                rng.sample(judge_categories, rng.randint(1, 3))
+            ),
+            JudgeColumnNames.IS_PAPER_REVIEWER: rng.choice(("Yes", "No")),
+        }
+        for column_name, slots in time_slots.items():
+            row[column_name] = ",".join(slots)
+        judge_rows.append(row)
+
+    student_rows = [
+        {
+            StudentColumnNames.SUBMISSION_NUMBER: str(1000 + number),
+            StudentColumnNames.PARTICIPATION_TYPE: rng.choice(PARTICIPATION_TYPES),
+            StudentColumnNames.CATEGORY: rng.choice(student_categories),
+            StudentColumnNames.POSTER_PDF_UPLOAD: f"https://example.org/posters/{number}.pdf",
+            StudentColumnNames.PAPER_PDF_UPLOAD: f"https://example.org/papers/{number}.pdf",
+        }
+        for number in range(num_students)
+    ]
+    return judge_rows, student_rows
+
+
+def build_rosters(judge_rows, student_rows):
+    # Each pair of rosters gets a ledger of its own, so earlier runs are not kept alive
+    reset_default_ledger()
+    return (
+        [judge_from_row(row) for row in judge_rows],
+        [student_from_row(row) for row in student_rows],
+    )
+
+
+def run_strategies(presentation_strategy, paper_strategy, judge_roster, student_roster):
+    # Returns the first line of the assignment error, or None if both strategies succeeded
+    try:
+        PRESENTATION_STRATEGIES[presentation_strategy](judge_roster, student_roster)
+        PAPER_STRATEGIES[paper_strategy](judge_roster, student_roster)
+    except (PresentationAssignmentError, PaperAssignmentError) as e:
+        return e.message.splitlines()[0]
+    return None
+
+
+def verify_schedule(judge_rows, student_rows, judge_roster, student_roster):
+    # Returns the first line of the verification error, or None if the schedule passed
+    try:
+        verify_rows(judge_rows, student_rows, judge_roster, student_roster)
+    except OutputVerificationError as e:
+        return e.message.splitlines()[0]
+    return None
+
+
+def compare_strategies(
+    judge_rows, student_rows, presentation_strategies=None, paper_strategies=None
+):
+    # Every strategy is run on freshly built rosters, and building them is not measured
+    results = []
+    for presentation_strategy in presentation_strategies or usable_presentation_strategies():
+        for paper_strategy in paper_strategies or sorted(PAPER_STRATEGIES):
+            judge_roster, student_roster = build_rosters(judge_rows, student_rows)
+            start = time.perf_counter()
+            error = run_strategies(
+                presentation_strategy, paper_strategy, judge_roster, student_roster
+            )
+            seconds = time.perf_counter() - start
+            if error is None:
+                # A schedule that the output check would reject is not feasible either
+                error = verify_schedule(judge_rows, student_rows, judge_roster, student_roster)
+
+            traced_rosters = build_rosters(judge_rows, student_rows)
+            tracemalloc.start()
+            run_strategies(presentation_strategy, paper_strategy, *traced_rosters)
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            loads = [
+                len(judge.assigned_presentations) + len(judge.assigned_papers)
+                for judge in judge_roster
+                if judge.presentation_availability or judge.is_paper_reviewer
+            ] or [0]
+            results.append(
+                StrategyResult(
+                    presentation_strategy=presentation_strategy,
+                    paper_strategy=paper_strategy,
+                    error=error,
+                    seconds=seconds,
+                    peak_memory=peak_memory,
+                    max_load=max(loads),
+                    load_spread=max(loads) - min(loads),
+                    load_deviation=statistics.pstdev(loads),
+                )
+            )
+    return results
+
+
+def write_rows_csv(csv_filename, rows):
+    with open(csv_filename, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def time_phases(judge_csv_filename, student_csv_filename):
+    # Seconds taken by each phase of one run of the pipeline, without writing any output files
+    seconds = {}
+    reset_default_ledger()
+    start = time.perf_counter()
+    judge_roster = load_judge_roster(judge_csv_filename)
+    student_roster = load_student_roster(student_csv_filename)
+    seconds["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assign_presentations(judge_roster, student_roster)
+    seconds["assign_presentations"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assign_papers(judge_roster, student_roster)
+    seconds["assign_papers"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verify_output(judge_csv_filename, student_csv_filename, judge_roster, student_roster)
+    seconds["verify_output"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _, headers, rows in render_tables(judge_roster, student_roster):
+        writer = csv.writer(io.StringIO())
+        writer.writerow(headers)
+        writer.writerows(rows)
+    seconds["render"] = time.perf_counter() - start
+    return seconds
+
+
+def calibrate():
+    # Seconds taken by a fixed workload of the same kind of work as the pipeline
+    # (building dicts, sorting, and joining strings)
+    start = time.perf_counter()
+    rng = random.Random(0)
+    rows = [{"id": str(number), "value": rng.random()} for number in range(20000)]
+    rows.sort(key=lambda row: row["value"])
+    ",".join(row["id"] for row in rows)
+    return time.perf_counter() - start
+
+
+def measure_phases(repeats=5, sizes=REGRESSION_SIZES, seed=REGRESSION_SEED):
+    # Returns the median seconds of each phase for each roster size, keyed by
+    # "{judges}x{students}", and the median seconds of the calibration workload
+    medians = {}
+    calibrations = []
+    with tempfile.TemporaryDirectory() as folder:
+        for num_judges, num_students in sizes:
+            judge_rows, student_rows = generate_rows(num_judges, num_students, seed=seed)
+            judge_csv_filename = Path(folder) / f"judges_{num_judges}.csv"
+            student_csv_filename = Path(folder) / f"students_{num_students}.csv"
+            write_rows_csv(judge_csv_filename, judge_rows)
+            write_rows_csv(student_csv_filename, student_rows)
+
+            runs = []
+            for _ in range(repeats):
+                calibrations.append(calibrate())
+                runs.append(time_phases(judge_csv_filename, student_csv_filename))
+            medians[f"{num_judges}x{num_students}"] = {
+                phase: statistics.median(run[phase] for run in runs) for phase in PHASES
+            }
+    return medians, statistics.median(calibrations)
+
+
+def save_baseline(baseline_filename, medians, calibration, repeats):
+    baseline = {
+        "calibration": calibration,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeats": repeats,
+        "seed": REGRESSION_SEED,
+        "medians": medians,
+    }
+    with open(baseline_filename, "w", encoding="utf-8") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def scaled_baseline(baseline, calibration):
+    # Baseline medians converted to the speed of this machine
+    scale = calibration / baseline["calibration"]
+    return {
+        size: {phase: seconds * scale for phase, seconds in phases.items()}
+        for size, phases in baseline["medians"].items()
+    }
+
+
+def find_regressions(medians, baseline_medians, threshold=0.5, min_seconds=0.001):
+    # A phase has regressed if it is more than threshold (a fraction) slower than the
+    # baseline. Differences under min_seconds are ignored since they are mostly noise.
+    regressions = []
+    for size, phases in medians.items():
+        for phase, seconds in phases.items():
+            baseline_seconds = baseline_medians.get(size, {}).get(phase)
+            if baseline_seconds is None:
+                continue
+            if (
+                seconds > baseline_seconds * (1 + threshold)
+                and seconds - baseline_seconds > min_seconds
+            ):
+                regressions.append(PhaseRegression(size, phase, baseline_seconds, seconds))
+    return regressions
+
+
+def print_phase_report(medians, baseline_medians, regressions):
+    regressed = {(regression.size, regression.phase) for regression in regressions}
+    print(
+        f"{'Size':<12} {'Phase':<22} {'Baseline (ms)':>14} {'Median (ms)':>12} {'Change':>8}"
+    )
+    for size, phases in medians.items():
+        for phase, seconds in phases.items():
+            baseline_seconds = baseline_medians.get(size, {}).get(phase)
+            if baseline_seconds is None:
+                print(f"{size:<12} {phase:<22} {'-':>14} {seconds * 1000:>12.1f}")
+                continue
+            change = seconds / baseline_seconds - 1 if baseline_seconds else 0
+            flag = "  REGRESSED" if (size, phase) in regressed else ""
+            print(
+                f"{size:<12} {phase:<22} {baseline_seconds * 1000:>14.1f} "
+                f"{seconds * 1000:>12.1f} {change:>+8.0%}{flag}"
+            )
+
+
+def check_baseline(baseline_filename, repeats, threshold):
+    # Returns True if no phase has regressed
+    try:
+        with open(baseline_filename, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    except FileNotFoundError:
+        print(
+            f'[Error]\nNo benchmark baseline was found at "{baseline_filename}".\n'
+            "Run benchmark.py with --update-baseline to make one."
+        )
+        return False
+
+    medians, calibration = measure_phases(repeats)
+    baseline_medians = scaled_baseline(baseline, calibration)
+    regressions = find_regressions(medians, baseline_medians, threshold)
+    print_phase_report(medians, baseline_medians, regressions)
+    if regressions:
+        print(
+            f"\n{len(regressions)} phase(s) became more than {threshold:.0%} slower than the baseline."
+        )
+        return False
+    print(f"\nNo phase became more than {threshold:.0%} slower than the baseline.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the assignment strategies.")
+    parser.add_argument("--judges", type=int, default=300, help="number of judges (default: 300)")
+    parser.add_argument("--students", type=int, default=600, help="number of students (default: 600)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic input (default: 0)")
+    parser.add_argument(
+        "--presentation-strategy",
+        action="append",
+        choices=usable_presentation_strategies(),
+        help="only compare this presentation strategy (can be given more than once)",
+    )
+    parser.add_argument(
+        "--paper-strategy",
+        action="append",
+        choices=sorted(PAPER_STRATEGIES),
+        help="only compare this paper strategy (can be given more than once)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="check each phase of the pipeline for regressions against the baseline instead",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="measure each phase of the pipeline and save the results as the new baseline",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_FILE,
+        help="baseline file (default: benchmark_baseline.json next to this file)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="fraction by which a phase may be slower than the baseline (default: 0.5)",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="runs per roster size for --check (default: 5)"
+    )
+    args = parser.parse_args()
+
+    if args.update_baseline:
+        medians, calibration = measure_phases(args.repeats)
+        save_baseline(args.baseline, medians, calibration, args.repeats)
+        print_phase_report(medians, {}, [])
+        print(f"\nSaved the baseline to {args.baseline}.")
+        return
+    if args.check:
+        sys.exit(0 if check_baseline(args.baseline, args.repeats, args.threshold) else 1)
+
+    judge_rows, student_rows = generate_rows(args.judges, args.students, seed=args.seed)
+    results = compare_strategies(
+        judge_rows, student_rows, args.presentation_strategy, args.paper_strategy
+    )
+
+    print(
+        f"{'Presentations':<22} {'Papers':<22} {'Time (ms)':>10} {'Peak (KiB)':>11} "
+        f"{'Max load':>9} {'Spread':>7} {'Std dev':>8}"
+    )
+    for result in results:
+        print(
+            f"{result.presentation_strategy:<22} {result.paper_strategy:<22} "
+            f"{result.seconds * 1000:>10.1f} {result.peak_memory / 1024:>11.1f} "
+            f"{result.max_load:>9} {result.load_spread:>7} {result.load_deviation:>8.2f}"
+        )
+        if result.error:
+            print(f"  Not feasible: {result.error}")
+
+
+if __name__ == "__main__":
+    main()
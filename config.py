@@ -53,6 +53,8 @@ class StudentColumnNames:
     CATEGORY = "Research Category of Competition. Please note: your chosen category is not guaranteed."
     POSTER_PDF_UPLOAD = "Upload Digital Poster as PDF."
     PAPER_PDF_UPLOAD = "Upload Full Paper as PDF."
+    # Optional, only used to send notifications to students
+    EMAIL = "Email Address"
 
 
 ################ Submission categories ################
@@ -116,10 +118,75 @@ START_DATE = "2021-01-18"
 START_TIME = 8
 END_TIME = 20
 
+################ Assignment ################
+
+# Names of the strategies used to assign presentations and papers. Run "main.py --help"
+# to list the available strategies, and "benchmark.py" to compare them.
+PRESENTATION_STRATEGY = "category_round_robin"
+PAPER_STRATEGY = "category_round_robin"
+
+# Number of judges who evaluate each poster presentation together, at the same time.
+# The "panel" presentation strategy works with any number, "paired_time_slots" needs 2,
+# and the other presentation strategies need 1.
+JUDGES_PER_POSTER = 1
+
+# Largest number of assignment events that wait to be consumed when assignments are
+# streamed (as with "main.py --progress"), before scheduling waits for the consumer
+EVENT_QUEUE_SIZE = 1000
+
 ################ Input/output ################
 
 INPUT_FOLDER_PATH = "input"
 OUTPUT_FOLDER_PATH = "output"
+# Each of these can also be the name of a folder (inside the input folder) holding
+# several CSV files, for example one per form or sheet tab, which are combined
 STUDENT_DATA = "student_data.csv"
 JUDGE_DATA = "judge_data.csv"
+# Input files at least this large (in bytes) are split into chunks that are parsed in
+# parallel, one per CPU core
+PARALLEL_INGEST_MIN_BYTES = 16 * 1024 * 1024
 ERROR_FILE = "error.txt"
+
+# Record of the assignments from the last successful run, written to the output folder.
+# It is used to regenerate output files with "main.py --render-only".
+SCHEDULE_FILE = "schedule.json"
+
+# Written to the output folder by "main.py --trace", and read by decision_trace.py
+DECISION_TRACE_FILE = "decision_trace.bin"
+
+# Database that holds the rosters and assignments with "main.py --out-of-core", replaced
+# on every such run, and the number of judges or students loaded at once to write output
+STORE_FILE = "schedule_store.sqlite3"
+STORE_BATCH_SIZE = 500
+
+# Set to True to also write every output table as a sheet of a single Excel workbook
+WRITE_XLSX = False
+XLSX_FILE = "schedule.xlsx"
+
+# Set to True to also write a zip archive with an iCalendar (.ics) file for every
+# poster judge and every poster student
+WRITE_ICS = False
+ICS_BUNDLE_FILE = "calendars.zip"
+
+################ Notifications ################
+
+# Set to True to email every judge and student their assignments after a successful run
+SEND_NOTIFICATIONS = False
+
+SMTP_HOST = "localhost"
+SMTP_PORT = 25
+SMTP_USE_STARTTLS = False
+# Leave the username blank if the server does not require a login
+SMTP_USERNAME = ""
+SMTP_PASSWORD = ""
+MAIL_FROM = ""
+
+# Number of SMTP connections kept open at once, number of messages sent per batch,
+# and the maximum number of messages sent per second across all connections
+MAIL_CONNECTIONS = 2
+MAIL_BATCH_SIZE = 20
+MAIL_MAX_PER_SECOND = 5
+
+# Record of which messages have been sent. Keep this file between runs so that
+# nobody is emailed twice; delete it to send every message again.
+SENT_LOG_FILE = "sent_log.txt"
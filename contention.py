@@ -0,0 +1,75 @@
+"""Live index of which judges are still free at each time slot in each category.
+
+Unlike get_cat_time_judges in appendix.py, which builds the same map from scratch,
+the index is built once and kept up to date as assignments use up judges' time
+slots. Every update takes constant time (for each of the judge's categories). The
+slots of each category are kept in buckets by how many judges are still free at them,
+so finding the least contended slot only has to look at the slots in one bucket.
+
+Ties are always broken the same way, by the earliest time, so that an index that is
+kept up to date and one that is built from scratch partway through scheduling (as in
+out-of-core mode) choose the same slots.
+"""
+
+
+class ContentionIndex:
+    def __init__(self, judge_roster):
+        # category -> time index -> {judge ID: Judge} of the judges who are free then
+        self._free_judges = {}
+        # category -> number of free judges -> {time index: None}, used as a set
+        self._buckets = {}
+        # category -> highest number of free judges at any slot (may be stale, only ever too high)
+        self._max_count = {}
+
+        for judge in judge_roster:
+            # Filter out judges who only review papers
+            if not judge.presentation_slots:
+                continue
+            # Judges may already have presentations, for example when scheduling one category at a time
+            assigned_times = set(judge.assigned_times)
+            for category in judge.preferred_categories:
+                slots = self._free_judges.setdefault(category, {})
+                for time_index in judge.presentation_availability:
+                    if time_index not in assigned_times:
+                        slots.setdefault(time_index, {})[judge.judge_id] = judge
+
+        for category, slots in self._free_judges.items():
+            buckets = self._buckets[category] = {}
+            for time_index in sorted(slots):
+                buckets.setdefault(len(slots[time_index]), {})[time_index] = None
+            self._max_count[category] = max(buckets, default=0)
+
+    def free_judges(self, category, time_index):
+        # Judges in the category who are free at the given time, in roster order
+        return list(self._free_judges.get(category, {}).get(time_index, {}).values())
+
+    def free_count(self, category, time_index):
+        return len(self._free_judges.get(category, {}).get(time_index, {}))
+
+    def least_contended_slot(self, category):
+        # The earliest time with the most free judges in the category, or None if no
+        # judge in the category is free at any time
+        buckets = self._buckets.get(category)
+        if not buckets:
+            return None
+        # Counts only ever go down, so the pointer only has to move down past empty buckets
+        count = self._max_count[category]
+        while count > 0 and not buckets.get(count):
+            count -= 1
+        self._max_count[category] = count
+        if not count:
+            return None
+        return min(buckets[count])
+
+    def use_slot(self, judge, time_index):
+        # The judge is no longer free at this time, in any of their categories
+        for category in judge.preferred_categories:
+            judges = self._free_judges.get(category, {}).get(time_index)
+            if not judges or judge.judge_id not in judges:
+                continue
+            buckets = self._buckets[category]
+            count = len(judges)
+            del buckets[count][time_index]
+            del judges[judge.judge_id]
+            if count > 1:
+                buckets.setdefault(count - 1, {})[time_index] = None
@@ -0,0 +1,189 @@
+"""Optional trace of the decisions made while assigning judges.
+
+While a trace is active, every assignment (and every paper that had to be set aside
+because of a conflict) is appended as a fixed-size binary record of the round it was
+made in, the student's category, the judge ID, the student ID, and a reason code.
+Records are kept in a bounded ring buffer, so the oldest ones are dropped if there are
+more than it can hold. When no trace is active, `active` is None, and the only cost
+is checking it before each assignment.
+
+The trace can be written to a file and read back to explain a judge's or student's
+assignments. Run this file directly to do so for the trace of the last run:
+
+    python decision_trace.py --judge "First Last"
+    python decision_trace.py --student 1234
+"""
+
+import argparse
+import struct
+from collections import namedtuple
+from pathlib import Path
+
+
+# Reason codes
+PRESENTATION = 1  # presentation assigned by a strategy without its own reason codes
+PRESENTATION_ROUND = 2  # presentation assigned in a round of assign_presentations
+PAPER = 3  # paper assigned by a strategy without its own reason codes
+PAPER_WITH_PRESENTATION = 4  # paper given to the student's presentation judge
+PAPER_ROUND = 5  # paper assigned in a round of assign_papers
+PAPER_CONFLICT = 6  # paper set aside, since the judge already reviews it
+PAPER_CONFLICT_RESOLVED = 7  # set aside paper given to the least busy other reviewer
+
+REASON_DESCRIPTIONS = {
+    PRESENTATION: "assigned presentation",
+    PRESENTATION_ROUND: "assigned presentation (judge had at most this many presentations)",
+    PAPER: "assigned paper",
+    PAPER_WITH_PRESENTATION: "assigned paper (judge also evaluates the student's presentation)",
+    PAPER_ROUND: "assigned paper (judge had at most this many papers)",
+    PAPER_CONFLICT: "paper set aside (judge already reviews this paper)",
+    PAPER_CONFLICT_RESOLVED: "assigned set aside paper (judge had the fewest papers and presentations)",
+}
+
+# round, category, judge ID, student ID, reason code
+RECORD = struct.Struct("<IHqqB")
+FILE_HEADER = b"JSHSTRACE1\n"
+
+TraceRecord = namedtuple(
+    "TraceRecord", ["round", "category", "judge_id", "student_id", "reason"]
+)
+
+# The trace that assignments are recorded in, or None if tracing is off
+active = None
+
+
+class DecisionTrace:
+    def __init__(self, capacity=1 << 18):
+        self.capacity = capacity  # int, maximum number of records kept
+        self.dropped = 0  # int, number of oldest records that were overwritten
+        self._buffer = bytearray()  # grows until it holds capacity records, then wraps around
+        self._next = 0  # int, index of the record that is written next
+
+        # Set by the strategies that have their own reason codes
+        self.round = 0
+        self.presentation_reason = PRESENTATION
+        self.paper_reason = PAPER
+
+    def record_count(self):
+        return len(self._buffer) // RECORD.size
+
+    def set_context(self, round_, presentation_reason=PRESENTATION, paper_reason=PAPER):
+        self.round = round_
+        self.presentation_reason = presentation_reason
+        self.paper_reason = paper_reason
+
+    def record(self, judge_id, student, reason):
+        packed = RECORD.pack(self.round, student.category, judge_id, student.student_id, reason)
+        if len(self._buffer) < self.capacity * RECORD.size:
+            self._buffer += packed
+        else:
+            start = self._next * RECORD.size
+            self._buffer[start : start + RECORD.size] = packed
+            self.dropped += 1
+        self._next = (self._next + 1) % self.capacity
+
+    def records(self):
+        # Oldest first
+        count = self.record_count()
+        first = self._next if count == self.capacity else 0
+        for number in range(count):
+            yield TraceRecord(
+                *RECORD.unpack_from(self._buffer, ((first + number) % count) * RECORD.size)
+            )
+
+    def for_judge(self, judge_id):
+        return [record for record in self.records() if record.judge_id == judge_id]
+
+    def for_student(self, student_id):
+        return [record for record in self.records() if record.student_id == student_id]
+
+    def write(self, trace_filename):
+        with open(trace_filename, "wb") as trace_file:
+            trace_file.write(FILE_HEADER)
+            for record in self.records():
+                trace_file.write(RECORD.pack(*record))
+
+    @classmethod
+    def read(cls, trace_filename):
+        with open(trace_filename, "rb") as trace_file:
+            if trace_file.read(len(FILE_HEADER)) != FILE_HEADER:
+                raise ValueError(f'"{trace_filename}" is not a decision trace file')
+            data = trace_file.read()
+        trace = cls(capacity=max(len(data) // RECORD.size, 1))
+        trace._buffer = bytearray(data[: len(data) - len(data) % RECORD.size])
+        trace._next = trace.record_count() % trace.capacity
+        return trace
+
+
+def enable(capacity=1 << 18):
+    global active
+    active = DecisionTrace(capacity)
+    return active
+
+
+def disable():
+    global active
+    active = None
+
+
+def describe_record(record):
+    return f"Round {record.round}: {REASON_DESCRIPTIONS.get(record.reason, f'reason {record.reason}')}"
+
+
+def main():
+    # Imported here, since judge.py imports this module
+    from ingest import load_judge_roster
+    from config import (
+        CATEGORY_NUMBERS_TO_LABELS,
+        INPUT_FOLDER_PATH,
+        OUTPUT_FOLDER_PATH,
+        JUDGE_DATA,
+        DECISION_TRACE_FILE,
+    )
+
+    parser = argparse.ArgumentParser(
+        description='Explain assignments from the trace written by "main.py --trace".'
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--judge", help="judge's full name or email address")
+    group.add_argument("--student", type=int, help="student's submission number")
+    args = parser.parse_args()
+
+    trace_path = Path(OUTPUT_FOLDER_PATH) / DECISION_TRACE_FILE
+    try:
+        trace = DecisionTrace.read(trace_path)
+    except FileNotFoundError:
+        print(
+            f"[Error]\nThere is no decision trace at {str(trace_path.resolve())}.\n"
+            'Run the scheduler with "python main.py --trace" first.'
+        )
+        return
+    judges_by_id = {
+        judge.judge_id: judge
+        for judge in load_judge_roster(Path(INPUT_FOLDER_PATH) / JUDGE_DATA)
+    }
+    if args.judge:
+        name = args.judge.strip().lower()
+        judge_ids = [
+            judge_id
+            for judge_id, judge in judges_by_id.items()
+            if name in (str(judge).lower(), (judge.email or "").lower())
+        ]
+        if not judge_ids:
+            print(f"No judge named {args.judge} was found in the input data.")
+            return
+        records = [record for judge_id in judge_ids for record in trace.for_judge(judge_id)]
+    else:
+        records = trace.for_student(args.student)
+
+    if not records:
+        print("The trace has no decisions about them.")
+    for record in records:
+        judge = judges_by_id.get(record.judge_id, record.judge_id)
+        print(
+            f"{describe_record(record)}: {judge} and student {record.student_id} "
+            f"({CATEGORY_NUMBERS_TO_LABELS[record.category]})"
+        )
+
+
+if __name__ == "__main__":
+    main()
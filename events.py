@@ -0,0 +1,102 @@
+"""Assignments as a stream of events, for consumers that work while scheduling runs.
+
+stream_assignments() runs an assignment function (a strategy, or several in turn) in a
+worker thread and yields an event for every assignment as soon as it is made, in the
+order the ledger records them. Any strategy works, since the events come from the
+ledger rather than from the strategy itself.
+
+At most EVENT_QUEUE_SIZE events wait to be consumed at once. When a consumer falls
+behind, the strategy waits for it instead of letting events pile up in memory. An
+error raised by the strategy is raised by the generator after the events made before
+it, and a consumer that stops early (by closing the generator or breaking out of a
+loop over it) stops the strategy as well.
+"""
+
+import queue
+import threading
+from collections import namedtuple
+
+from ledger import PRESENTATION
+from config import EVENT_QUEUE_SIZE
+
+
+PresentationAssigned = namedtuple(
+    "PresentationAssigned", ["judge", "student", "time_index"]
+)
+PaperAssigned = namedtuple("PaperAssigned", ["judge", "student"])
+# An assignment that was taken back, where kind is ledger.PRESENTATION or ledger.PAPER
+AssignmentUndone = namedtuple("AssignmentUndone", ["judge", "student", "kind"])
+
+# Put on the queue once the assignment function has returned or raised
+_FINISHED = object()
+
+
+class StreamClosed(Exception):
+    """Raised in the worker thread when the consumer stops reading events."""
+
+
+def stream_assignments(assign, judge_roster, student_roster):
+    # Yields the events of assign(judge_roster, student_roster) while it runs
+    ledgers = {
+        id(entity.ledger): entity.ledger for entity in judge_roster + student_roster
+    }.values()
+    events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+    closed = threading.Event()
+    errors = []
+
+    def put(event):
+        # Blocks while the queue is full, checking now and then if the consumer has gone
+        while True:
+            if closed.is_set():
+                raise StreamClosed()
+            try:
+                events.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def on_record(judge, student, kind, time_index):
+        if kind == PRESENTATION:
+            put(PresentationAssigned(judge, student, time_index))
+        else:
+            put(PaperAssigned(judge, student))
+
+    def on_rollback(judge, student, kind):
+        put(AssignmentUndone(judge, student, kind))
+
+    def run():
+        try:
+            assign(judge_roster, student_roster)
+        except StreamClosed:
+            pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            if not closed.is_set():
+                # Waits for room like any other event, so it is never lost
+                try:
+                    put(_FINISHED)
+                except StreamClosed:
+                    pass
+
+    for ledger in ledgers:
+        if ledger.on_record is not None or ledger.on_rollback is not None:
+            raise RuntimeError("The rosters' assignments are already being streamed")
+        ledger.on_record = on_record
+        ledger.on_rollback = on_rollback
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while True:
+            event = events.get()
+            if event is _FINISHED:
+                break
+            yield event
+    finally:
+        closed.set()
+        worker.join()
+        for ledger in ledgers:
+            ledger.on_record = None
+            ledger.on_rollback = None
+    if errors:
+        raise errors[0]
@@ -0,0 +1,132 @@
+"""Bulk iCalendar (.ics) export of poster presentation assignments.
+
+One calendar is generated per poster judge and per poster student. All calendars are
+written into a single zip archive in one pass over the judges' assignments.
+"""
+
+import datetime
+import re
+import zipfile
+
+from util import index_to_datetime
+from config import CATEGORY_NUMBERS_TO_LABELS
+
+
+# Each presentation takes up one half-hour slot (see create_judge_roster)
+PRESENTATION_LENGTH = datetime.timedelta(minutes=30)
+
+_CALENDAR_START = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//JSHS Scheduling//Poster Presentations//EN\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:PUBLISH\r\n"
+)
+_CALENDAR_END = "END:VCALENDAR\r\n"
+_EVENT_TEMPLATE = (
+    "BEGIN:VEVENT\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{dtstamp}\r\n"
+    "{times}"
+    "{summary}"
+    "{description}"
+    "END:VEVENT\r\n"
+)
+
+# Characters that cannot appear in the file names inside the archive
+_UNSAFE_FILE_NAME_CHARS = re.compile(r"[^\w.-]+")
+
+
+def write_calendar_bundle(zip_filename, judge_roster):
+    dtstamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    times_by_index = {}  # Rendered DTSTART/DTEND lines, cached per presentation time index
+
+    def render_times(index):
+        if index not in times_by_index:
+            start = index_to_datetime(index)
+            times_by_index[index] = (
+                f"DTSTART:{start:%Y%m%dT%H%M%S}\r\n"
+                f"DTEND:{start + PRESENTATION_LENGTH:%Y%m%dT%H%M%S}\r\n"
+            )
+        return times_by_index[index]
+
+    with zipfile.ZipFile(zip_filename, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for judge in judge_roster:
+            if not judge.assigned_presentations:
+                continue
+
+            judge_events = []
+            for student in sorted(
+                judge.assigned_presentations,
+                key=lambda student: student.presentation_time,
+            ):
+                times = render_times(student.presentation_time)
+                category = CATEGORY_NUMBERS_TO_LABELS[student.category]
+                judge_events.append(
+                    _EVENT_TEMPLATE.format(
+                        uid=f"judge-{judge.judge_id}-student-{student.student_id}@jshs-scheduling",
+                        dtstamp=dtstamp,
+                        times=times,
+                        summary=_content_line(
+                            "SUMMARY",
+                            f"JSHS poster judging: Student {student.student_id}",
+                        ),
+                        description=_content_line(
+                            "DESCRIPTION",
+                            f"Category: {category}\nPoster PDF: {student.poster_pdf}",
+                        ),
+                    )
+                )
+
+                # Each student's calendar is written once, alongside their first judge's event
+                if student.presentation_judges[0] != judge:
+                    continue
+                judge_names = ", ".join(
+                    str(panel_judge) for panel_judge in student.presentation_judges
+                )
+                student_event = _EVENT_TEMPLATE.format(
+                    uid=f"student-{student.student_id}@jshs-scheduling",
+                    dtstamp=dtstamp,
+                    times=times,
+                    summary=_content_line("SUMMARY", "JSHS poster presentation"),
+                    description=_content_line(
+                        "DESCRIPTION",
+                        f"Submission number: {student.student_id}\nCategory: {category}\nPoster judge(s): {judge_names}",
+                    ),
+                )
+                bundle.writestr(
+                    f"students/{student.student_id}.ics",
+                    _CALENDAR_START + student_event + _CALENDAR_END,
+                )
+
+            file_name = _UNSAFE_FILE_NAME_CHARS.sub(
+                "_", f"{judge.first}_{judge.last}_{judge.judge_id}"
+            )
+            bundle.writestr(
+                f"judges/{file_name}.ics",
+                _CALENDAR_START + "".join(judge_events) + _CALENDAR_END,
+            )
+
+
+def _content_line(name, text):
+    # Escapes a text value and folds the resulting line at 75 octets, as required by RFC 5545
+    text = (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+    line = f"{name}:{text}".encode("utf-8")
+    folded = []
+    # Continuation lines start with a space, which leaves room for 74 octets of the line
+    while len(line) > (75 if not folded else 74):
+        cut = 75 if not folded else 74
+        # Never split a multi-byte UTF-8 character
+        while line[cut] & 0xC0 == 0x80:
+            cut -= 1
+        folded.append(line[:cut])
+        line = line[cut:]
+    folded.append(line)
+    return b"\r\n ".join(folded).decode("utf-8") + "\r\n"
@@ -0,0 +1,191 @@
+"""Reading the judge and student input data into rosters.
+
+The input for each kind of record can be a single CSV file or a folder of CSV files
+(one per form or sheet tab). Folders are parsed in parallel worker processes and
+merged into one roster, and so are large single files, which are split into chunks
+of whole records. Judges who appear more than once are merged by identity:
+their email address if they gave one, and otherwise their name and phone number.
+"""
+
+import csv
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from judge import Judge
+from student import Student
+from row_store import CsvRowStore, LazyRow
+from util import (
+    time_slot_to_time,
+    column_name_to_date,
+    date_and_time_to_index,
+)
+from config import (
+    JudgeColumnNames,
+    StudentColumnNames,
+    JUDGE_CATEGORIES,
+    STUDENT_CATEGORIES,
+    PARALLEL_INGEST_MIN_BYTES,
+)
+
+
+def roster_files(path):
+    # A roster is either a single CSV file or a folder of CSV files, read in name order
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob("*.csv"))
+    return [path]
+
+
+def iter_roster_rows(path):
+    # Yields the row dicts of every file in the roster, in order
+    for csv_filename in roster_files(path):
+        with open(csv_filename, encoding="utf-8") as csvfile:
+            yield from csv.DictReader(csvfile)
+
+
+def judge_identity_key(row):
+    email = (row.get(JudgeColumnNames.EMAIL) or "").strip().lower()
+    if email:
+        return f"email:{email}"
+    first = (row.get(JudgeColumnNames.FIRST_NAME) or "").strip().lower()
+    last = (row.get(JudgeColumnNames.LAST_NAME) or "").strip().lower()
+    phone = re.sub(r"\D", "", row.get(JudgeColumnNames.PHONE) or "")
+    return f"name:{first}|{last}|{phone}"
+
+
+def judge_id_from_identity_key(identity_key):
+    # A hash of the identity key, so the same judge gets the same ID no matter
+    # which file or line their record comes from
+    digest = hashlib.blake2b(identity_key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def judge_from_row(row, row_ref=None):
+    # If row_ref is given, contact details are left to be read through it when they are needed
+    new_presentation_availability = list()
+    for column_name, times_selected in row.items():
+        if column_name not in JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES:
+            continue
+        column_date = column_name_to_date(column_name)
+        if times_selected:
+            for time_slot in times_selected.split(","):
+                if not time_slot:
+                    continue
+                index_at_00_min = date_and_time_to_index(
+                    column_date,
+                    time_slot_to_time(time_slot),
+                )
+                new_presentation_availability.append(index_at_00_min)
+                new_presentation_availability.append(index_at_00_min + 0.5)
+
+    return Judge(
+        judge_id=judge_id_from_identity_key(judge_identity_key(row)),
+        first=row[JudgeColumnNames.FIRST_NAME],
+        last=row[JudgeColumnNames.LAST_NAME],
+        email=None if row_ref else row[JudgeColumnNames.EMAIL],
+        phone=None if row_ref else row[JudgeColumnNames.PHONE],
+        preferred_categories=[
+            JUDGE_CATEGORIES[category]
+            for category in JUDGE_CATEGORIES
+            if category in row[JudgeColumnNames.PREFERRED_CATEGORIES]
+        ],
+        is_paper_reviewer=row[JudgeColumnNames.IS_PAPER_REVIEWER] == "Yes",
+        presentation_availability=new_presentation_availability,
+        row_ref=row_ref,
+    )
+
+
+def student_from_row(row, row_ref=None):
+    # If row_ref is given, PDF links are left to be read through it when they are needed
+    return Student(
+        student_id=int(row[StudentColumnNames.SUBMISSION_NUMBER]),
+        is_paper="Oral" in row[StudentColumnNames.PARTICIPATION_TYPE],
+        is_poster="Poster" in row[StudentColumnNames.PARTICIPATION_TYPE],
+        category=STUDENT_CATEGORIES[row[StudentColumnNames.CATEGORY]],
+        poster_pdf=None if row_ref else row[StudentColumnNames.POSTER_PDF_UPLOAD],
+        full_paper_pdf=None if row_ref else row[StudentColumnNames.PAPER_PDF_UPLOAD],
+        email=None if row_ref else row.get(StudentColumnNames.EMAIL),
+        row_ref=row_ref,
+    )
+
+
+def create_judge_roster(csv_filename, start=None, end=None):
+    # Reads the rows between the given byte offsets, or the whole file by default
+    judge_roster = list()
+    seen_judge_ids = set()
+    row_store = CsvRowStore(csv_filename)
+
+    # Create an entry in the roster for each judge with their preferred categories and availability.
+    # Contact details are left in the memory-mapped file and read when they are needed for output.
+    for row_offset, row in row_store.iter_rows(start, end):
+        if not any(row.values()):
+            continue
+        new_judge = judge_from_row(row, row_ref=LazyRow(row_store, row_offset))
+        # Only the first record of a judge who filled in the form more than once is used
+        if new_judge.judge_id in seen_judge_ids:
+            continue
+        seen_judge_ids.add(new_judge.judge_id)
+        judge_roster.append(new_judge)
+
+    return judge_roster
+
+
+def create_student_roster(csv_filename, start=None, end=None):
+    student_roster = []
+    row_store = CsvRowStore(csv_filename)
+
+    # Create an entry in the roster for each student, leaving the PDF links in the memory-mapped file
+    for row_offset, row in row_store.iter_rows(start, end):
+        student_roster.append(
+            student_from_row(row, row_ref=LazyRow(row_store, row_offset))
+        )
+
+    return student_roster
+
+
+def _file_chunks(csv_filename, worker_count):
+    # (file, start, end) of the chunks a file is parsed in. Files smaller than
+    # PARALLEL_INGEST_MIN_BYTES are parsed whole.
+    if worker_count < 2 or os.path.getsize(csv_filename) < PARALLEL_INGEST_MIN_BYTES:
+        return [(csv_filename, None, None)]
+    boundaries = CsvRowStore(csv_filename).chunk_boundaries(worker_count)
+    return [
+        (csv_filename, start, end) for start, end in zip(boundaries, boundaries[1:])
+    ]
+
+
+def _parse_files(create_roster, csv_filenames):
+    # Parses each file (or chunk of a large file) in its own worker process if there is
+    # more than one. The partial rosters are returned in file and row order.
+    worker_count = os.cpu_count() or 1
+    chunks = [
+        chunk
+        for csv_filename in csv_filenames
+        for chunk in _file_chunks(csv_filename, worker_count)
+    ]
+    if len(chunks) == 1:
+        return [create_roster(*chunks[0])]
+    with ProcessPoolExecutor(max_workers=min(len(chunks), worker_count)) as executor:
+        return list(executor.map(create_roster, *zip(*chunks)))
+
+
+def load_judge_roster(path):
+    judge_roster = []
+    seen_judge_ids = set()
+    for partial_roster in _parse_files(create_judge_roster, roster_files(path)):
+        for judge in partial_roster:
+            if judge.judge_id in seen_judge_ids:
+                continue
+            seen_judge_ids.add(judge.judge_id)
+            judge_roster.append(judge)
+    return judge_roster
+
+
+def load_student_roster(path):
+    student_roster = []
+    for partial_roster in _parse_files(create_student_roster, roster_files(path)):
+        student_roster += partial_roster
+    return student_roster
@@ -1,5 +1,16 @@
+import decision_trace
+from config import JudgeColumnNames, JUDGES_PER_POSTER
+from ledger import AssignmentList, default_ledger
+from row_store import LazyField
+
+
 class Judge:
     PAPER_LIMIT = 7
+    PRESENTATION_JUDGE_LIMIT = JUDGES_PER_POSTER
+
+    # Contact details are only needed for output, so they can be read lazily from the input file
+    email = LazyField(JudgeColumnNames.EMAIL)
+    phone = LazyField(JudgeColumnNames.PHONE)
 
     def __init__(
         self,
@@ -11,21 +22,46 @@ class Judge:
         preferred_categories,
         is_paper_reviewer,
         presentation_availability,
+        row_ref=None,
+        ledger=None,
     ):
         self.judge_id = judge_id  # int
         self.first = first  # str
         self.last = last  # str
-        self.email = email  # str
-        self.phone = phone  # str
+        self.row_ref = row_ref  # LazyRow, or None if every field was passed in
+        self.email = email  # str, or None to read it from row_ref
+        self.phone = phone  # str, or None to read it from row_ref
         self.preferred_categories = preferred_categories  # list of int
         self.is_paper_reviewer = is_paper_reviewer  # bool
         self.presentation_availability = presentation_availability  # list of float
 
         self.presentation_slots = len(self.presentation_availability)  # int
 
-        self.assigned_presentations = []  # list of Student
-        self.assigned_times = []  # list of float
-        self.assigned_papers = []  # list of Student
+        # Assignments are recorded in the ledger, which keeps these up to date
+        self.ledger = ledger if ledger is not None else default_ledger()  # AssignmentLedger
+        self.assigned_presentations = AssignmentList()  # list of Student
+        self.assigned_times = AssignmentList()  # list of float
+        self.assigned_papers = AssignmentList()  # list of Student
+
+    def __getstate__(self):
+        # Assignments stay behind in the ledger, so copies start without any
+        state = self.__dict__.copy()
+        for name in (
+            "ledger",
+            "assigned_presentations",
+            "assigned_times",
+            "assigned_papers",
+        ):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.presentation_slots = len(self.presentation_availability)
+        self.ledger = default_ledger()
+        self.assigned_presentations = AssignmentList()
+        self.assigned_times = AssignmentList()
+        self.assigned_papers = AssignmentList()
 
     def __eq__(self, other):
         return self.judge_id == other.judge_id
@@ -33,20 +69,21 @@ class Judge:
     def assign_presentation(self, student, time_index=None):
         if not self.presentation_slots:
             raise Exception("No slots available")
-        if len(student.presentation_judges) >= 2:
+        if len(student.presentation_judges) >= self.PRESENTATION_JUDGE_LIMIT:
             raise Exception("Too many presentation judges")
-        if (
-            len(student.presentation_judges) == 1
-            and student.presentation_judges[0] == self
-        ):
+        if self in student.presentation_judges:
             raise Exception("Trying to add same judge twice")
-        self.presentation_slots -= 1
-        self.assigned_presentations.append(student)
-        if not time_index:
-            time_index = self.presentation_availability[self.presentation_slots]
-        self.assigned_times.append(time_index)
-        student.presentation_judges.append(self)
-        student.presentation_time = time_index
+        if time_index is None:
+            time_index = self.presentation_availability[self.presentation_slots - 1]
+        # A panel evaluates the presentation together
+        if student.presentation_judges and time_index != student.presentation_time:
+            raise Exception("Panel judges must evaluate the presentation at the same time")
+        # Updates presentation_slots and the assignment lists of both
+        self.ledger.record_presentation(self, student, time_index)
+        if decision_trace.active:
+            decision_trace.active.record(
+                self.judge_id, student, decision_trace.active.presentation_reason
+            )
 
     def assign_paper(self, student):
         # if len(self.assigned_papers) >= self.PAPER_LIMIT:
@@ -55,8 +92,11 @@ class Judge:
             raise Exception("Too many paper judges")
         if len(student.paper_judges) == 1 and student.paper_judges[0] == self:
             raise Exception("Trying to add same judge twice")
-        self.assigned_papers.append(student)
-        student.paper_judges.append(self)
+        self.ledger.record_paper(self, student)
+        if decision_trace.active:
+            decision_trace.active.record(
+                self.judge_id, student, decision_trace.active.paper_reason
+            )
 
     def __str__(self):
         return f"{self.first} {self.last}"
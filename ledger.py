@@ -0,0 +1,203 @@
+"""Central record of every assignment of a judge to a student.
+
+Each assignment is recorded once, as a row of parallel arrays (judge, student, and
+time slot). The judge and student columns hold references to the objects themselves,
+so recording an assignment needs no lookups, and papers are told apart from
+presentations by a time slot of PAPER_SLOT.
+
+The assignment lists of judges and students (Judge.assigned_presentations,
+Student.paper_judges, and so on) are kept up to date by the ledger as records are
+made. They can be read like any other list, but can only be changed through the
+ledger, so they always agree with it.
+
+Records are only ever appended, so they double as an undo log. checkpoint() returns
+the current position, and rollback() removes every record made since then, one
+record at a time in constant time each, which lets a search try out assignments
+and take them back.
+
+Listeners can be set to be told about every record as it is made or rolled back,
+which is how events.py streams assignments while a strategy is running. Recording is
+on the hot path of every strategy, so the listener is only checked for while one is
+set.
+
+Every judge and student belongs to one ledger, which is the default ledger unless
+they are bound to another one before they are assigned anything.
+"""
+
+from array import array
+
+
+# Kinds of assignment
+PRESENTATION = 0
+PAPER = 1
+
+# Assignment lists of judges and of students
+_ASSIGNMENT_LISTS = (
+    "assigned_presentations",
+    "assigned_papers",
+    "presentation_judges",
+    "paper_judges",
+)
+
+# Time slot recorded for papers, which is never a presentation time
+PAPER_SLOT = -1.0
+
+_append = list.append
+
+
+class AssignmentList(list):
+    """List of one judge's or student's assignments, kept up to date by their ledger."""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Assignments can only be changed through the ledger")
+
+    append = extend = insert = pop = remove = clear = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    # sort() is allowed, for example to restore the order of a saved schedule
+
+
+class AssignmentLedger:
+    def __init__(self):
+        # One entry per record
+        self._judges = []  # list of Judge
+        self._students = []  # list of Student
+        self._slots = array("d")  # time index of presentations, PAPER_SLOT for papers
+
+        # If set, called with (judge, student, kind, time index) after every record, and
+        # with (judge, student, kind) after one is rolled back
+        self._on_record = None
+        self.on_rollback = None
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def on_record(self):
+        return self._on_record
+
+    @on_record.setter
+    def on_record(self, listener):
+        # While a listener is set, the record methods of this ledger are replaced by
+        # ones that also call it
+        self._on_record = listener
+        if listener is None:
+            self.__dict__.pop("record_presentation", None)
+            self.__dict__.pop("record_paper", None)
+        else:
+            self.record_presentation = self._record_presentation_and_notify
+            self.record_paper = self._record_paper_and_notify
+
+    def bind(self, entity):
+        # Moves a judge or student who has no assignments yet into this ledger
+        if entity.ledger is self:
+            return
+        if any(getattr(entity, name, None) for name in _ASSIGNMENT_LISTS):
+            raise ValueError(f"{entity} already has assignments in another ledger")
+        entity.ledger = self
+
+    def record(self, judge, student, kind, time_index=None):
+        if kind == PRESENTATION:
+            self.record_presentation(judge, student, time_index)
+        else:
+            self.record_paper(judge, student)
+        return len(self._slots) - 1
+
+    def record_presentation(self, judge, student, time_index):
+        if judge.ledger is not self or student.ledger is not self:
+            raise ValueError(
+                f"{judge} and student {student.student_id} do not belong to this ledger"
+            )
+        self._judges.append(judge)
+        self._students.append(student)
+        self._slots.append(time_index)
+        _append(judge.assigned_presentations, student)
+        _append(judge.assigned_times, time_index)
+        _append(student.presentation_judges, judge)
+        judge.presentation_slots -= 1
+        student.presentation_time = time_index
+
+    def record_paper(self, judge, student):
+        if judge.ledger is not self or student.ledger is not self:
+            raise ValueError(
+                f"{judge} and student {student.student_id} do not belong to this ledger"
+            )
+        self._judges.append(judge)
+        self._students.append(student)
+        self._slots.append(PAPER_SLOT)
+        _append(judge.assigned_papers, student)
+        _append(student.paper_judges, judge)
+
+    def _record_presentation_and_notify(self, judge, student, time_index):
+        AssignmentLedger.record_presentation(self, judge, student, time_index)
+        self._on_record(judge, student, PRESENTATION, time_index)
+
+    def _record_paper_and_notify(self, judge, student):
+        AssignmentLedger.record_paper(self, judge, student)
+        self._on_record(judge, student, PAPER, None)
+
+    def checkpoint(self):
+        return len(self._slots)
+
+    def records(self, start=0):
+        # Yields (judge, student, kind, time index) for every record from the given
+        # position on, oldest first. The time index is None for papers.
+        for position in range(start, len(self._slots)):
+            time_index = self._slots[position]
+            if time_index == PAPER_SLOT:
+                yield self._judges[position], self._students[position], PAPER, None
+            else:
+                yield self._judges[position], self._students[position], PRESENTATION, time_index
+
+    def rollback(self, checkpoint):
+        # Removes every record made since the checkpoint, newest first
+        while len(self._slots) > checkpoint:
+            kind = PAPER if self._slots.pop() == PAPER_SLOT else PRESENTATION
+            judge = self._judges.pop()
+            student = self._students.pop()
+            if kind == PRESENTATION:
+                position = _remove_newest(judge.assigned_presentations, student)
+                list.__delitem__(judge.assigned_times, position)
+                _remove_newest(student.presentation_judges, judge)
+                judge.presentation_slots += 1
+                student.presentation_time = _presentation_time(student)
+            else:
+                _remove_newest(judge.assigned_papers, student)
+                _remove_newest(student.paper_judges, judge)
+            if self.on_rollback is not None:
+                self.on_rollback(judge, student, kind)
+
+
+def _remove_newest(assignments, entity):
+    # The newest record is last, unless the list was reordered with sort()
+    position = len(assignments) - 1
+    while assignments[position] is not entity:
+        position -= 1
+    list.__delitem__(assignments, position)
+    return position
+
+
+def _presentation_time(student):
+    # Time of the student's remaining presentation, or None if they have none left
+    if not student.presentation_judges:
+        return None
+    judge = student.presentation_judges[-1]
+    position = len(judge.assigned_presentations) - 1
+    while judge.assigned_presentations[position] is not student:
+        position -= 1
+    return judge.assigned_times[position]
+
+
+_default_ledger = AssignmentLedger()
+
+
+def default_ledger():
+    return _default_ledger
+
+
+def reset_default_ledger():
+    # Judges and students created (or unpickled) from now on belong to a new, empty ledger
+    global _default_ledger
+    _default_ledger = AssignmentLedger()
+    return _default_ledger
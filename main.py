@@ -1,18 +1,48 @@
+import argparse
+import contextlib
 import csv
+import functools
 from pathlib import Path
 import shutil
+import heapq
 import itertools
 
-from judge import Judge
-from student import Student
+import appendix  # Registers the strategies kept in the appendix
+import decision_trace
+from strategies import (
+    PRESENTATION_STRATEGIES,
+    PAPER_STRATEGIES,
+    register_presentation_strategy,
+    register_paper_strategy,
+    get_presentation_strategy,
+    group_posters_by_category,
+    presentation_shortage_error,
+)
+from ingest import (
+    load_judge_roster,
+    load_student_roster,
+    iter_roster_rows,
+    judge_identity_key,
+    judge_id_from_identity_key,
+)
+from validation import validate_input
+from render import OUTPUT_TABLES, render_tables
+from artifact import save_schedule, read_schedule, check_input_hash, apply_schedule
+from contention import ContentionIndex
+from admission import AdmissionIndex
+from events import PresentationAssigned, PaperAssigned, AssignmentUndone, stream_assignments
+from ledger import PRESENTATION
+from store import ScheduleStore
+from xlsx import XlsxWorkbook
+from ics import write_calendar_bundle
+from notify import send_notifications
 from util import (
     PresentationAssignmentError,
+    PaperAssignmentError,
     OutputVerificationError,
-    time_slot_to_time,
-    column_name_to_date,
-    date_and_time_to_index,
+    ScheduleArtifactError,
+    InputValidationError,
     index_to_datetime,
-    index_to_datetime_str,
     get_column_name_from_datetime,
     get_time_slot_availability_string_from_datetime,
     value_to_excel_csv_string,
@@ -29,92 +59,23 @@ from config import (
     STUDENT_DATA,
     JUDGE_DATA,
     ERROR_FILE,
+    SCHEDULE_FILE,
+    WRITE_XLSX,
+    XLSX_FILE,
+    WRITE_ICS,
+    ICS_BUNDLE_FILE,
+    SEND_NOTIFICATIONS,
+    DECISION_TRACE_FILE,
+    STORE_FILE,
+    PRESENTATION_STRATEGY,
+    PAPER_STRATEGY,
+    JUDGES_PER_POSTER,
 )
 
 
-def create_judge_roster(csv_filename):
-    with open(csv_filename, encoding="utf-8") as csvfile:
-        judge_roster = list()
-        csvreader = csv.DictReader(csvfile)
-
-        # Create an entry in the roster for each judge with their contact details, preferred categories, and availability
-        for row in csvreader:
-            if not any(row.values()):
-                continue
-
-            new_presentation_availability = list()
-            for column_name, times_selected in row.items():
-                if column_name not in JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES:
-                    continue
-                column_date = column_name_to_date(column_name)
-                if times_selected:
-                    for time_slot in times_selected.split(","):
-                        if not time_slot:
-                            continue
-                        index_at_00_min = date_and_time_to_index(
-                            column_date,
-                            time_slot_to_time(time_slot),
-                        )
-                        new_presentation_availability.append(index_at_00_min)
-                        new_presentation_availability.append(index_at_00_min + 0.5)
-
-            new_judge = Judge(
-                judge_id=csvreader.line_num,  # using the line number as a sequential ID field for each judge
-                first=row[JudgeColumnNames.FIRST_NAME],
-                last=row[JudgeColumnNames.LAST_NAME],
-                email=row[JudgeColumnNames.EMAIL],
-                phone=row[JudgeColumnNames.PHONE],
-                preferred_categories=[
-                    JUDGE_CATEGORIES[category]
-                    for category in JUDGE_CATEGORIES
-                    if category in row[JudgeColumnNames.PREFERRED_CATEGORIES]
-                ],
-                is_paper_reviewer=row[JudgeColumnNames.IS_PAPER_REVIEWER] == "Yes",
-                presentation_availability=new_presentation_availability,
-            )
-            judge_roster.append(new_judge)
-
-    return judge_roster
-
-
-def create_student_roster(csv_filename):
-    with open(csv_filename, encoding="utf-8") as csvfile:
-        student_roster = []
-
-        csvreader = csv.DictReader(csvfile)
-        # Create an entry in the roster for each student
-        for row in csvreader:
-            new_student = Student(
-                student_id=int(row[StudentColumnNames.SUBMISSION_NUMBER]),
-                is_paper="Oral" in row[StudentColumnNames.PARTICIPATION_TYPE],
-                is_poster="Poster" in row[StudentColumnNames.PARTICIPATION_TYPE],
-                category=STUDENT_CATEGORIES[row[StudentColumnNames.CATEGORY]],
-                poster_pdf=row[StudentColumnNames.POSTER_PDF_UPLOAD],
-                full_paper_pdf=row[StudentColumnNames.PAPER_PDF_UPLOAD],
-            )
-            student_roster.append(new_student)
-
-    return student_roster
-
-
+@register_presentation_strategy("category_round_robin")
 def assign_presentations(judge_roster, student_roster):
-    # Aggregate all students by category who will be poster presenters
-    students_by_cat = {
-        cat: [
-            student
-            for student in student_roster
-            if student.is_poster and student.category == cat
-        ]
-        for cat in STUDENT_CATEGORIES.values()
-    }
-
-    category_judges = {category: [] for category in JUDGE_CATEGORIES.values()}
-    for judge in judge_roster:
-        # Filter out judges who only review papers
-        if not judge.presentation_slots:
-            continue
-        for category in judge.preferred_categories:
-            category_judges[category].append(judge)
+    students_by_cat, category_judges = group_posters_by_category(judge_roster, student_roster)
 
     for cat in sorted(
         category_judges, key=lambda category: len(category_judges[category])
@@ -123,6 +84,12 @@ def assign_presentations(judge_roster, student_roster):
 
         assigned_yet = 0
         while students and assigned_yet <= len(students_by_cat[cat]):
+            if decision_trace.active:
+                decision_trace.active.set_context(
+                    assigned_yet,
+                    decision_trace.PRESENTATION_ROUND,
+                    decision_trace.PAPER_WITH_PRESENTATION,
+                )
             judges = [
                 judge
                 for judge in category_judges[cat]
@@ -140,15 +107,88 @@ def assign_presentations(judge_roster, student_roster):
             assigned_yet += 1
 
         if students:
-            error_message = (
-                f"The category {CATEGORY_NUMBERS_TO_LABELS[cat]} did not have enough judges to evaluate all presentations.\n"
-                "Either assign more judges to this category or transfer some students out of this category.\n"
-                f"There are {len(students_by_cat[cat])} student(s) in this category who are presenting posters and {len(category_judges[category])} "
-                "judge(s) who have submitted availability to evaluate poster presentations.\n"
+            raise presentation_shortage_error(
+                cat, len(students_by_cat[cat]), len(category_judges[cat])
+            )
+
+
+@register_presentation_strategy("least_contended_slot")
+def assign_presentations_by_contention(judge_roster, student_roster):
+    # Each student is placed at the time when the most judges in their category are
+    # still free, with whichever of those judges has the fewest presentations so far
+    students_by_cat, category_judges = group_posters_by_category(judge_roster, student_roster)
+
+    contention_index = ContentionIndex(judge_roster)
+    for cat in sorted(
+        category_judges, key=lambda category: len(category_judges[category])
+    ):
+        students = students_by_cat[cat][:]
+
+        while students:
+            time_index = contention_index.least_contended_slot(cat)
+            if time_index is None:
+                break
+            judge = min(
+                contention_index.free_judges(cat, time_index),
+                key=lambda judge: len(judge.assigned_presentations),
             )
-            raise PresentationAssignmentError(error_message)
+            student = students.pop()
+            judge.assign_presentation(student, time_index)
+            contention_index.use_slot(judge, time_index)
+            if judge.is_paper_reviewer and student.is_paper:
+                judge.assign_paper(student)
 
+        if students:
+            raise presentation_shortage_error(
+                cat, len(students_by_cat[cat]), len(category_judges[cat])
+            )
+
+
+@register_presentation_strategy("panel", panel_size=None)
+def assign_presentation_panels(judge_roster, student_roster):
+    # Each student is evaluated by a panel of JUDGES_PER_POSTER judges from their
+    # category, at the time when the most of them are still free, by whichever of
+    # those judges have the fewest presentations so far. The contention index already
+    # holds the judges who are free at each time, so no pairs of judges are compared.
+    students_by_cat, category_judges = group_posters_by_category(judge_roster, student_roster)
 
+    contention_index = ContentionIndex(judge_roster)
+    for cat in sorted(
+        category_judges, key=lambda category: len(category_judges[category])
+    ):
+        students = students_by_cat[cat][:]
+
+        while students:
+            time_index = contention_index.least_contended_slot(cat)
+            if (
+                time_index is None
+                or contention_index.free_count(cat, time_index) < JUDGES_PER_POSTER
+            ):
+                break
+            panel = heapq.nsmallest(
+                JUDGES_PER_POSTER,
+                contention_index.free_judges(cat, time_index),
+                key=lambda judge: len(judge.assigned_presentations),
+            )
+            student = students.pop()
+            for judge in panel:
+                judge.assign_presentation(student, time_index)
+                contention_index.use_slot(judge, time_index)
+                # Up to two of the panel judges who review papers also review the student's paper
+                if (
+                    judge.is_paper_reviewer
+                    and student.is_paper
+                    and len(student.paper_judges) < 2
+                ):
+                    judge.assign_paper(student)
+
+        if students:
+            raise presentation_shortage_error(
+                cat, len(students_by_cat[cat]), len(category_judges[cat]), JUDGES_PER_POSTER
+            )
+
+
+@register_paper_strategy("category_round_robin")
 def assign_papers(judge_roster, student_roster):
     # Aggregate all students by category who will be poster presenters
     students_by_cat = {
@@ -176,8 +216,22 @@ def assign_papers(judge_roster, student_roster):
         students = students_by_cat[cat][:]
         conflict_students = []
 
+        # Every paper needs two different reviewers from its category
+        if students and len(category_judges[cat]) < 2:
+            error_message = (
+                f"The category {CATEGORY_NUMBERS_TO_LABELS[cat]} did not have enough paper reviewers to review all papers.\n"
+                "Either assign more paper reviewers to this category or transfer some students out of this category.\n"
+                f"There are {len(students_by_cat[cat])} student(s) in this category who still need paper reviewers and {len(category_judges[cat])} "
+                "judge(s) who have volunteered to review papers in this category, but every paper needs 2 different reviewers.\n"
+            )
+            raise PaperAssignmentError(error_message, category=cat)
+
         assigned_yet = 0
         while students:
+            if decision_trace.active:
+                decision_trace.active.set_context(
+                    assigned_yet, paper_reason=decision_trace.PAPER_ROUND
+                )
             judges = [
                 judge
                 for judge in category_judges[cat]
@@ -190,6 +244,10 @@ def assign_papers(judge_roster, student_roster):
                 student = students.pop()
                 if len(student.paper_judges) == 1 and student.paper_judges[0] == judge:
                     conflict_students.append(student)
+                    if decision_trace.active:
+                        decision_trace.active.record(
+                            judge.judge_id, student, decision_trace.PAPER_CONFLICT
+                        )
                     break
                 judge.assign_paper(student)
                 if len(student.paper_judges) < 2:
@@ -198,6 +256,10 @@ def assign_papers(judge_roster, student_roster):
             assigned_yet += 1
 
         # Handle conflicts
+        if decision_trace.active:
+            decision_trace.active.set_context(
+                assigned_yet, paper_reason=decision_trace.PAPER_CONFLICT_RESOLVED
+            )
         judges = category_judges[cat][:]
         for student in conflict_students:
             judges.sort(
@@ -214,431 +276,576 @@ def assign_papers(judge_roster, student_roster):
                 judge.assign_paper(student)
 
 
+def assign_judges(presentation_strategy, paper_strategy, judge_roster, student_roster):
+    presentation_strategy(judge_roster, student_roster)
+    if decision_trace.active:
+        # Reasons set by the presentation strategy do not apply to the paper strategy
+        decision_trace.active.set_context(0)
+    paper_strategy(judge_roster, student_roster)
+
+
+def print_progress(events, student_roster):
+    # Consumes the assignment events, rewriting a single line of counts as they arrive
+    presentations_needed = sum(
+        JUDGES_PER_POSTER for student in student_roster if student.is_poster
+    )
+    papers_needed = sum(2 for student in student_roster if student.is_paper)
+    counts = {PresentationAssigned: 0, PaperAssigned: 0}
+    try:
+        for number, event in enumerate(events, start=1):
+            if isinstance(event, AssignmentUndone):
+                counts[PresentationAssigned if event.kind == PRESENTATION else PaperAssigned] -= 1
+            else:
+                counts[type(event)] += 1
+            if number % 100 == 0:
+                print(
+                    f"\rAssigned {counts[PresentationAssigned]}/{presentations_needed} presentation(s) "
+                    f"and {counts[PaperAssigned]}/{papers_needed} paper(s)",
+                    end="",
+                    flush=True,
+                )
+    finally:
+        print(
+            f"\rAssigned {counts[PresentationAssigned]}/{presentations_needed} presentation(s) "
+            f"and {counts[PaperAssigned]}/{papers_needed} paper(s)"
+        )
+
+
 def verify_output(
     judge_csv_filename, student_csv_filename, judge_roster, student_roster
 ):
+    verify_rows(
+        iter_roster_rows(judge_csv_filename),
+        iter_roster_rows(student_csv_filename),
+        judge_roster,
+        student_roster,
+    )
+
+
+def verify_rows(judge_rows, student_rows, judge_roster, student_roster):
+    # Checks the rosters against the input rows that they were built from
     # Verify judges
-    with open(judge_csv_filename, encoding="utf-8") as judge_csv_file:
-        judge_csvreader = csv.DictReader(judge_csv_file)
-
-        for row in judge_csvreader:
-            if not any(row.values()):
-                continue
-            first = row[JudgeColumnNames.FIRST_NAME]
-            last = row[JudgeColumnNames.LAST_NAME]
-            email = row[JudgeColumnNames.EMAIL]
-            phone = row[JudgeColumnNames.PHONE]
-            preferred_categories = [
-                JUDGE_CATEGORIES[category]
-                for category in JUDGE_CATEGORIES
-                if row[JudgeColumnNames.PREFERRED_CATEGORIES].find(category) != -1
-            ]
-            is_paper_reviewer = row[JudgeColumnNames.IS_PAPER_REVIEWER] == "Yes"
+    seen_judge_ids = set()
+    for row in judge_rows:
+        if not any(row.values()):
+            continue
+        # Judges who filled in the form more than once were merged into their first record
+        judge_id = judge_id_from_identity_key(judge_identity_key(row))
+        if judge_id in seen_judge_ids:
+            continue
+        seen_judge_ids.add(judge_id)
+        first = row[JudgeColumnNames.FIRST_NAME]
+        last = row[JudgeColumnNames.LAST_NAME]
+        email = row[JudgeColumnNames.EMAIL]
+        phone = row[JudgeColumnNames.PHONE]
+        preferred_categories = [
+            JUDGE_CATEGORIES[category]
+            for category in JUDGE_CATEGORIES
+            if row[JudgeColumnNames.PREFERRED_CATEGORIES].find(category) != -1
+        ]
+        is_paper_reviewer = row[JudgeColumnNames.IS_PAPER_REVIEWER] == "Yes"
 
-            # Find matching judges in output
-            matching_judges = [
-                judge
-                for judge in judge_roster
-                if (
-                    judge.first,
-                    judge.last,
-                    judge.email,
-                    judge.phone,
-                    judge.preferred_categories,
-                    judge.is_paper_reviewer,
-                )
-                == (first, last, email, phone, preferred_categories, is_paper_reviewer)
-            ]
+        # Find matching judges in output
+        # (contact details are compared last since they may have to be read from the input file)
+        matching_judges = [
+            judge
+            for judge in judge_roster
+            if (
+                judge.first,
+                judge.last,
+                judge.preferred_categories,
+                judge.is_paper_reviewer,
+            )
+            == (first, last, preferred_categories, is_paper_reviewer)
+            and (judge.email, judge.phone) == (email, phone)
+        ]
 
-            # Throw if more more than one output judge matches the input CSV row
-            if len(matching_judges) != 1:
-                error_message = (
-                    "For a given input judge, there was more than one judge in the output with matching details.\n"
-                    "Input judge's name and contact details:\n"
-                    f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
-                )
-                raise OutputVerificationError(error_message)
+        # Throw if more more than one output judge matches the input CSV row
+        if len(matching_judges) != 1:
+            error_message = (
+                "For a given input judge, there was more than one judge in the output with matching details.\n"
+                "Input judge's name and contact details:\n"
+                f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
+            )
+            raise OutputVerificationError(error_message)
 
-            judge = matching_judges[0]
+        judge = matching_judges[0]
 
-            # Check that the judge's presentation availability matches the input CSV row
-            for index in judge.presentation_availability:
-                index_dt = index_to_datetime(index)
-                column_name = get_column_name_from_datetime(index_dt)
-                if (
-                    get_time_slot_availability_string_from_datetime(index_dt)
-                    not in row[column_name]
-                ):
-                    error_message = (
-                        "For a given input judge, their processed judge object was incorrectly set to be available for some amount of time slots during which they are not actually available.\n"
-                        "Input judge's name and contact details:\n"
-                        f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
-                    )
-                    raise OutputVerificationError(error_message)
-
-            # Check that the judge's assigned presentations are in their presentation availability
-            for student in judge.assigned_presentations:
-                if student.presentation_time not in judge.presentation_availability:
-                    error_message = (
-                        "A given input judge was assigned a presentation for a time at which they are not available.\n"
-                        "Input judge's name and contact details:\n"
-                        f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
-                        f"Presentation time that they were incorrectly assigned: {get_time_slot_availability_string_from_datetime(student.presentation_time)}."
-                    )
-                    raise OutputVerificationError(error_message)
-
-            # Check that the judge is a paper reviewer if they are assigned papers
-            if judge.assigned_papers and not is_paper_reviewer:
+        # Check that the judge's presentation availability matches the input CSV row
+        for index in judge.presentation_availability:
+            index_dt = index_to_datetime(index)
+            column_name = get_column_name_from_datetime(index_dt)
+            if (
+                get_time_slot_availability_string_from_datetime(index_dt)
+                not in row[column_name]
+            ):
                 error_message = (
-                    "A given input judge who was not marked as a paper reviewer was assigned papers.\n"
+                    "For a given input judge, their processed judge object was incorrectly set to be available for some amount of time slots during which they are not actually available.\n"
                     "Input judge's name and contact details:\n"
                     f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
                 )
                 raise OutputVerificationError(error_message)
 
-            # Check that the judge has selected the categories that they are judging
-            assigned_student_categories = [
-                student.category
-                for student in judge.assigned_papers + judge.assigned_papers
-            ]
-            for category in assigned_student_categories:
-                if (
-                    CATEGORY_NUMBERS_TO_LABELS_JUDGES[category]
-                    not in row[JudgeColumnNames.PREFERRED_CATEGORIES]
-                ):
-                    assigned_presentation_students = "\n".join(
-                        [
-                            f"Student ID: {student.student_id}"
-                            for student in judge.assigned_presentatons
-                        ]
-                    )
-                    assigned_paper_students = "\n".join(
-                        [
-                            f"Student ID: {student.student_id}"
-                            for student in judge.assigned_papers
-                        ]
-                    )
-                    error_message = (
-                        "A given input judge was assigned some amount of papers or presentations whose category the judge did not select.\n"
-                        "Input judge's name and contact details:\n"
-                        f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}.\n"
-                        f"Input judge's assigned presentations:\n{assigned_presentation_students}.\n"
-                        if assigned_presentation_students
-                        else ""
-                        f"Input judge's assigned papers:\n{assigned_paper_students}.\n"
-                        if assigned_paper_students
-                        else ""
-                    )
-                    raise OutputVerificationError(error_message)
-
-            # Check that the judge's preferred categories match the input CSV row
-            for category in judge.preferred_categories:
-                if (
-                    CATEGORY_NUMBERS_TO_LABELS_JUDGES[category]
-                    not in row[JudgeColumnNames.PREFERRED_CATEGORIES]
-                ):
-                    error_message = (
-                        "For a given input judge, their processed judge object was incorrectly set to prefer some amount of categories which they do not actually prefer.\n"
-                        "Input judge's name and contact details:\n"
-                        f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}.\n"
-                        f"Input judge's processed preferred categories:\n{', '.join([CATEGORY_NUMBERS_TO_LABELS_JUDGES[pref_cat] for pref_cat in judge.preferred_categories])}.\n"
-                    )
-                    raise OutputVerificationError(error_message)
-
-    # Verify students
-    with open(student_csv_filename, encoding="utf-8") as students_csv_file:
-        student_csvreader = csv.DictReader(students_csv_file)
-
-        for row in student_csvreader:
-            if not any(row.values()):
-                continue
-
-            student_id = int(row[StudentColumnNames.SUBMISSION_NUMBER])
-            matching_students = [
-                student
-                for student in student_roster
-                if student.student_id == student_id
-            ]
-
-            # Throw if more more than one output student matches the input CSV row
-            if len(matching_students) != 1:
+        # Check that the judge's assigned presentations are in their presentation availability
+        for student in judge.assigned_presentations:
+            if student.presentation_time not in judge.presentation_availability:
                 error_message = (
-                    "For a given input student, there was more than one student in the output with matching details.\n"
-                    f"Input student's submission number: {student_id}\n"
+                    "A given input judge was assigned a presentation for a time at which they are not available.\n"
+                    "Input judge's name and contact details:\n"
+                    f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
+                    f"Presentation time that they were incorrectly assigned: {get_time_slot_availability_string_from_datetime(student.presentation_time)}."
                 )
                 raise OutputVerificationError(error_message)
 
-            student = matching_students[0]
+        # Check that the judge is not assigned more than one presentation at the same time
+        if len(set(judge.assigned_times)) != len(judge.assigned_times):
+            error_message = (
+                "A given input judge was assigned more than one presentation at the same time.\n"
+                "Input judge's name and contact details:\n"
+                f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
+            )
+            raise OutputVerificationError(error_message)
 
-            # Check that a student has the correct category
-            if STUDENT_CATEGORIES[row[StudentColumnNames.CATEGORY]] != student.category:
-                error_message = (
-                    "For a given input student, the category does not match the output student's category.\n"
-                    f"Input student's submission number: {student_id}\n"
-                )
-                raise OutputVerificationError(error_message)
+        # Check that the judge is a paper reviewer if they are assigned papers
+        if judge.assigned_papers and not is_paper_reviewer:
+            error_message = (
+                "A given input judge who was not marked as a paper reviewer was assigned papers.\n"
+                "Input judge's name and contact details:\n"
+                f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}."
+            )
+            raise OutputVerificationError(error_message)
 
-            # Check that a student is paper if they have been assigned paper
+        # Check that the judge has selected the categories that they are judging
+        assigned_student_categories = [
+            student.category
+            for student in judge.assigned_presentations + judge.assigned_papers
+        ]
+        for category in assigned_student_categories:
             if (
-                student.paper_judges
-                and "Oral" not in row[StudentColumnNames.PARTICIPATION_TYPE]
+                CATEGORY_NUMBERS_TO_LABELS_JUDGES[category]
+                not in row[JudgeColumnNames.PREFERRED_CATEGORIES]
             ):
+                assigned_presentation_students = "\n".join(
+                    [
+                        f"Student ID: {student.student_id}"
+                        for student in judge.assigned_presentations
+                    ]
+                )
+                assigned_paper_students = "\n".join(
+                    [
+                        f"Student ID: {student.student_id}"
+                        for student in judge.assigned_papers
+                    ]
+                )
                 error_message = (
-                    "A given input student was assigned paper judges when they are not an oral/paper presenter.\n"
-                    f"Input student's submission number: {student_id}\n"
+                    "A given input judge was assigned some amount of papers or presentations whose category the judge did not select.\n"
+                    "Input judge's name and contact details:\n"
+                    f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}.\n"
                 )
+                if assigned_presentation_students:
+                    error_message += f"Input judge's assigned presentations:\n{assigned_presentation_students}.\n"
+                if assigned_paper_students:
+                    error_message += f"Input judge's assigned papers:\n{assigned_paper_students}.\n"
                 raise OutputVerificationError(error_message)
 
-            # Check that a student is poster if they have been assigned posters
+        # Check that the judge's preferred categories match the input CSV row
+        for category in judge.preferred_categories:
             if (
-                student.presentation_judges
-                and "Poster" not in row[StudentColumnNames.PARTICIPATION_TYPE]
+                CATEGORY_NUMBERS_TO_LABELS_JUDGES[category]
+                not in row[JudgeColumnNames.PREFERRED_CATEGORIES]
             ):
                 error_message = (
-                    "A given input student was assigned presentation judges when they are not an poster presenter.\n"
-                    f"Input student's submission number: {student_id}\n"
+                    "For a given input judge, their processed judge object was incorrectly set to prefer some amount of categories which they do not actually prefer.\n"
+                    "Input judge's name and contact details:\n"
+                    f"First name: {first}, last name: {last}, email: {email}, phone number: {phone}.\n"
+                    f"Input judge's processed preferred categories:\n{', '.join([CATEGORY_NUMBERS_TO_LABELS_JUDGES[pref_cat] for pref_cat in judge.preferred_categories])}.\n"
                 )
                 raise OutputVerificationError(error_message)
 
-            # Check that the student has two paper judges (if needed)
-            if student.is_paper and len(student.paper_judges) != 2:
-                assigned_paper_judges = ", ".join(
-                    [f"{judge.first} {judge.last}" for judge in student.paper_judges]
-                )
-                error_message = (
-                    "A given input student was not assigned 2 paper judges, even though they are an oral/paper presenter.\n"
-                    f"Input student's submission number: {student_id}\n"
-                    f"Input student's assigned paper judges:\n{assigned_paper_judges if assigned_paper_judges else '[empty]'}\n"
-                )
+    # Verify students
 
-            # Check that the student has one poster judge (if needed)
-            if student.is_poster and len(student.presentation_judges) != 1:
-                assigned_poster_judges = ", ".join(
-                    [
-                        f"{judge.first} {judge.last}"
-                        for judge in student.presentation_judges
-                    ]
-                )
-                error_message = (
-                    "A given input student was not assigned 1 poster judge, even though they are a poster presenter.\n"
-                    f"Input student's submission number: {student_id}\n"
-                    f"Input student's assigned poster presentation judges:\n{assigned_poster_judges if assigned_poster_judges else '[empty]'}\n"
+    for row in student_rows:
+        if not any(row.values()):
+            continue
+
+        student_id = int(row[StudentColumnNames.SUBMISSION_NUMBER])
+        matching_students = [
+            student
+            for student in student_roster
+            if student.student_id == student_id
+        ]
+
+        # Throw if more more than one output student matches the input CSV row
+        if len(matching_students) != 1:
+            error_message = (
+                "For a given input student, there was more than one student in the output with matching details.\n"
+                f"Input student's submission number: {student_id}\n"
+            )
+            raise OutputVerificationError(error_message)
+
+        student = matching_students[0]
+
+        # Check that a student has the correct category
+        if STUDENT_CATEGORIES[row[StudentColumnNames.CATEGORY]] != student.category:
+            error_message = (
+                "For a given input student, the category does not match the output student's category.\n"
+                f"Input student's submission number: {student_id}\n"
+            )
+            raise OutputVerificationError(error_message)
+
+        # Check that a student is paper if they have been assigned paper
+        if (
+            student.paper_judges
+            and "Oral" not in row[StudentColumnNames.PARTICIPATION_TYPE]
+        ):
+            error_message = (
+                "A given input student was assigned paper judges when they are not an oral/paper presenter.\n"
+                f"Input student's submission number: {student_id}\n"
+            )
+            raise OutputVerificationError(error_message)
+
+        # Check that a student is poster if they have been assigned posters
+        if (
+            student.presentation_judges
+            and "Poster" not in row[StudentColumnNames.PARTICIPATION_TYPE]
+        ):
+            error_message = (
+                "A given input student was assigned presentation judges when they are not an poster presenter.\n"
+                f"Input student's submission number: {student_id}\n"
+            )
+            raise OutputVerificationError(error_message)
+
+        # Check that the student has two paper judges (if needed)
+        if student.is_paper and len(student.paper_judges) != 2:
+            assigned_paper_judges = ", ".join(
+                [f"{judge.first} {judge.last}" for judge in student.paper_judges]
+            )
+            error_message = (
+                "A given input student was not assigned 2 paper judges, even though they are an oral/paper presenter.\n"
+                f"Input student's submission number: {student_id}\n"
+                f"Input student's assigned paper judges:\n{assigned_paper_judges if assigned_paper_judges else '[empty]'}\n"
+            )
+            raise OutputVerificationError(error_message)
+
+        # Check that the student has a full panel of poster judges (if needed)
+        if student.is_poster and len(student.presentation_judges) != JUDGES_PER_POSTER:
+            assigned_poster_judges = ", ".join(
+                [
+                    f"{judge.first} {judge.last}"
+                    for judge in student.presentation_judges
+                ]
+            )
+            error_message = (
+                f"A given input student was not assigned {JUDGES_PER_POSTER} poster judge(s), even though they are a poster presenter.\n"
+                f"Input student's submission number: {student_id}\n"
+                f"Input student's assigned poster presentation judges:\n{assigned_poster_judges if assigned_poster_judges else '[empty]'}\n"
+            )
+            raise OutputVerificationError(error_message)
+
+
+def output_file_names():
+    return [file_name for file_name, _, _ in OUTPUT_TABLES] + [XLSX_FILE, ICS_BUNDLE_FILE]
+
+
+def write_output_files(
+    output_folder_path, judge_roster, student_roster, error=None, only=None, tables=None
+):
+    # Writes the output files (or just the ones in only) to an existing folder. The
+    # tables are rendered from the rosters, unless they are given.
+    if error:
+        with open(output_folder_path / ERROR_FILE, "w") as error_file:
+            error_file.write(error)
+        # The trace may explain why a category could not be scheduled
+        if decision_trace.active:
+            decision_trace.active.write(output_folder_path / DECISION_TRACE_FILE)
+        return
+
+    write_xlsx = WRITE_XLSX if only is None else XLSX_FILE in only
+    write_ics = WRITE_ICS if only is None else ICS_BUNDLE_FILE in only
+
+    # Each table is streamed to its CSV file and, if enabled, to its own sheet in the workbook
+    workbook = XlsxWorkbook(output_folder_path / XLSX_FILE) if write_xlsx else None
+    if tables is None:
+        tables = render_tables(judge_roster, student_roster)
+    for file_name, headers, rows in tables:
+        write_csv = only is None or file_name in only
+        if not (write_csv or workbook):
+            continue
+        sheet = workbook.add_sheet(Path(file_name).stem) if workbook else None
+        with contextlib.ExitStack() as stack:
+            output_writer = None
+            if write_csv:
+                output_csv = stack.enter_context(
+                    open(output_folder_path / file_name, "w", newline="")
                 )
+                output_writer = csv.writer(output_csv)
+            for row in itertools.chain([headers], rows):
+                if output_writer:
+                    output_writer.writerow(row)
+                if sheet:
+                    sheet.write_row(row)
+    if workbook:
+        workbook.close()
 
+    if write_ics:
+        write_calendar_bundle(output_folder_path / ICS_BUNDLE_FILE, judge_roster)
 
-def output(judge_roster, student_roster, error=None):
+    if decision_trace.active:
+        decision_trace.active.write(output_folder_path / DECISION_TRACE_FILE)
+
+
+def stage_output(judge_roster, student_roster, tables=None):
+    # Writes a complete new output folder next to the current one and returns its path
+    output_folder_path = Path(OUTPUT_FOLDER_PATH)
+    staging_path = output_folder_path.with_name(f".{output_folder_path.name}.staging")
+    if staging_path.exists():
+        # Left over from a run that was interrupted
+        shutil.rmtree(staging_path)
+    staging_path.mkdir(parents=True)
+    try:
+        write_output_files(staging_path, judge_roster, student_roster, tables=tables)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    return staging_path
+
+
+def recover_output():
+    # Puts the old output folder back if a run was interrupted between the two renames
+    # of commit_output, and otherwise removes what is left of it
+    output_folder_path = Path(OUTPUT_FOLDER_PATH)
+    old_path = output_folder_path.with_name(f".{output_folder_path.name}.old")
+    if not old_path.exists():
+        return
+    if output_folder_path.exists():
+        shutil.rmtree(old_path)
+    else:
+        old_path.rename(output_folder_path)
+
+
+def commit_output(staging_path):
+    # Swaps the staged folder in for the output folder. The old folder is only moved
+    # aside once the new one is complete, so the output folder is never half-written.
+    # The swap is two renames rather than one, so a run that is stopped between them
+    # leaves the old folder aside, where recover_output finds it.
     output_folder_path = Path(OUTPUT_FOLDER_PATH)
+    old_path = output_folder_path.with_name(f".{output_folder_path.name}.old")
+    recover_output()
     if output_folder_path.exists():
-        shutil.rmtree(output_folder_path)
-    output_folder_path.mkdir()
+        output_folder_path.rename(old_path)
+    staging_path.rename(output_folder_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def output(
+    judge_roster,
+    student_roster,
+    error=None,
+    only=None,
+    staging_path=None,
+    schedule_inputs=None,
+):
+    # If error is given, it is written to the output folder, and the files of the last successful run are left alone.
+    # If only is given, just those output files are (re)written and the rest of the output folder is left alone.
+    # Otherwise the whole output folder is replaced, by the one in staging_path if it was already written.
+    # If schedule_inputs (the judge and student data paths) are given, the schedule is saved along with it.
+    output_folder_path = Path(OUTPUT_FOLDER_PATH)
+    if error or only is not None:
+        output_folder_path.mkdir(parents=True, exist_ok=True)
+        write_output_files(
+            output_folder_path, judge_roster, student_roster, error=error, only=only
+        )
+    else:
+        if staging_path is None:
+            staging_path = stage_output(judge_roster, student_roster)
+        if schedule_inputs:
+            save_schedule(staging_path / SCHEDULE_FILE, *schedule_inputs, judge_roster)
+        commit_output(staging_path)
 
     if error:
         error_path = output_folder_path / ERROR_FILE
         print(
             f"[Error]\n{error}\nCheck {str(error_path.resolve())} to review this error message."
         )
-        with open(error_path, "w") as error_file:
-            error_file.write(error)
         return
 
-    out = []
-    for judge in judge_roster:
-        out.append(
-            f"{judge.first} {judge.last}:"
-            f" Posters: {len(judge.assigned_presentations)}, Papers: {len(judge.assigned_papers)}"
+    print(
+        f"Scheduling successfully completed!\nOutput data can be found in {str(output_folder_path.resolve())}."
+    )
+
+
+def render_only(judge_data_path, student_data_path, file_names):
+    # Regenerates output files from the schedule saved by the last successful run
+    artifact_path = Path(OUTPUT_FOLDER_PATH) / SCHEDULE_FILE
+    unknown_file_names = set(file_names) - set(output_file_names())
+    if unknown_file_names:
+        print(
+            f"[Error]\nUnknown output file(s): {', '.join(sorted(unknown_file_names))}.\n"
+            f"Choose from: {', '.join(output_file_names())}."
         )
+        return
+    try:
+        artifact = read_schedule(artifact_path)
+        check_input_hash(artifact, judge_data_path, student_data_path)
+        judge_roster = load_judge_roster(judge_data_path)
+        student_roster = load_student_roster(student_data_path)
+        apply_schedule(artifact, judge_roster, student_roster)
+    except ScheduleArtifactError as e:
+        print(f"[Error]\n{e.message}")
+        return
 
-    for student in student_roster:
-        out.append(
-            f"{student.student_id}: "
-            f"{'Paper' if student.is_paper else ''}: {student.paper_judges[0] if len(student.paper_judges) else ''}, {student.paper_judges[1] if len(student.paper_judges) == 2 else ''}"
-            " | "
-            f"{'Poster' if student.is_poster else ''}: {student.presentation_judges[0] if len(student.presentation_judges) else ''}"
+    if file_names:
+        output(judge_roster, student_roster, only=set(file_names))
+    else:
+        output(
+            judge_roster,
+            student_roster,
+            schedule_inputs=(judge_data_path, student_data_path),
         )
 
-    student_headers = [
-        "Submission Number",
-        "Oral/Paper",
-        "Poster",
-        "Category",
-        "Paper Judge 1",
-        "Paper Judge 2",
-        "Poster Judge 1",
-        "Poster Date",
-        "Poster Time",
-    ]
-    paper_judges_headers = [
-        "First Name",
-        "Last Name",
-        "Email",
-        "Phone",
-        "Assigned Student Number",
-        "Paper PDF",
-    ]
-    poster_judges_headers = [
-        "First Name",
-        "Last Name",
-        "Email",
-        "Phone",
-        "Assigned Student Number",
-        "Date",
-        "Time",
-        "Poster PDF",
-    ]
-    judges_headers = [
-        "First Name",
-        "Last Name",
-        "Email",
-        "Phone",
-        "Poster Assignments",
-        "Paper Assignments",
-    ]
-    presentation_schedule_headers = [
-        "Date",
-        "Time",
-        "Student Number",
-        "Judge 1 First Name",
-        "Judge 1 Last Name",
-        "Judge 1 Email",
-        "Judge 1 Phone",
-    ]
-
-    with open(output_folder_path / "students.csv", "w", newline="") as students_csv:
-        student_writer = csv.writer(students_csv)
-        student_writer.writerow(student_headers)
-        for student in student_roster:
-            poster_date, poster_time = "", ""
-            if student.is_poster:
-                poster_date, poster_time = index_to_datetime_str(
-                    student.presentation_time
-                )
-            student_row = [
-                student.student_id,
-                "Yes" if student.is_paper else "No",
-                "Yes" if student.is_poster else "No",
-                CATEGORY_NUMBERS_TO_LABELS[student.category],
-                student.paper_judges[0] if student.is_paper else "",
-                student.paper_judges[1] if student.is_paper else "",
-                student.presentation_judges[0] if student.is_poster else "",
-                poster_date,
-                poster_time,
-            ]
-            student_writer.writerow(student_row)
-
-    with open(
-        output_folder_path / "paper_judges.csv", "w", newline=""
-    ) as paper_judges_csv:
-        paper_judges_writer = csv.writer(paper_judges_csv)
-        paper_judges_writer.writerow(paper_judges_headers)
-        for judge in judge_roster:
-            if not judge.is_paper_reviewer:
-                continue
-            for student in judge.assigned_papers:
-                paper_judge_row = [
-                    judge.first,
-                    judge.last,
-                    judge.email,
-                    judge.phone,
-                    student.student_id,
-                    student.full_paper_pdf,
-                ]
-                paper_judges_writer.writerow(paper_judge_row)
-
-    with open(
-        output_folder_path / "poster_judges.csv", "w", newline=""
-    ) as poster_judges_csv:
-        poster_judges_writer = csv.writer(poster_judges_csv)
-        poster_judges_writer.writerow(poster_judges_headers)
-        for judge in sorted(judge_roster, key=lambda judge: (judge.first, judge.last)):
-            if not judge.presentation_availability:
-                continue
-
-            for student in sorted(
-                judge.assigned_presentations,
-                key=lambda student: student.presentation_time,
-            ):
-                poster_date, poster_time = index_to_datetime_str(
-                    student.presentation_time
-                )
-                poster_judge_row = [
-                    judge.first,
-                    judge.last,
-                    judge.email,
-                    judge.phone,
-                    student.student_id,
-                    poster_date,
-                    poster_time,
-                    student.poster_pdf,
-                ]
-                poster_judges_writer.writerow(poster_judge_row)
-
-    with open(output_folder_path / "judges.csv", "w", newline="") as judges_csv:
-        judges_writer = csv.writer(judges_csv)
-        judges_writer.writerow(judges_headers)
-        for judge in sorted(judge_roster, key=lambda judge: (judge.first, judge.last)):
-
-            poster_assignment = []
-            paper_assignment = []
-            for student in sorted(
-                judge.assigned_presentations,
-                key=lambda student: student.presentation_time,
-            ):
-                poster_date, poster_time = index_to_datetime_str(
-                    student.presentation_time
-                )
-                poster_assignment.append(
-                    f"Student {student.student_id}: {poster_date} {poster_time}"
-                )
 
-            for student in sorted(
-                judge.assigned_papers, key=lambda student: student.student_id
-            ):
-                paper_assignment.append(f"Student {student.student_id}")
+def admit_new_students(judge_data_path, student_data_path):
+    # Gives judges to the students who were added to the student data since the last
+    # successful run, without changing anyone else's assignments
+    artifact_path = Path(OUTPUT_FOLDER_PATH) / SCHEDULE_FILE
+    try:
+        validate_input(judge_data_path, student_data_path)
+        artifact = read_schedule(artifact_path)
+        # The student data is expected to have changed, but the judge data is not
+        check_input_hash(artifact, judge_data_path=judge_data_path)
+        judge_roster = load_judge_roster(judge_data_path)
+        student_roster = load_student_roster(student_data_path)
+        apply_schedule(artifact, judge_roster, student_roster)
+
+        scheduled_student_ids = {
+            assignment[1] for assignment in artifact["presentations"] + artifact["papers"]
+        }
+        new_students = [
+            student
+            for student in student_roster
+            if student.student_id not in scheduled_student_ids
+            and (student.is_poster or student.is_paper)
+        ]
+        admission_index = AdmissionIndex(judge_roster)
+        for student in new_students:
+            admission_index.admit(student)
+        verify_output(judge_data_path, student_data_path, judge_roster, student_roster)
+    except (
+        InputValidationError,
+        ScheduleArtifactError,
+        PresentationAssignmentError,
+        PaperAssignmentError,
+        OutputVerificationError,
+    ) as e:
+        # The output folder still holds the last successful schedule, so it is left alone
+        print(f"[Error]\n{e.message}")
+        return
 
-            judge_row = [
-                judge.first,
-                judge.last,
-                judge.email,
-                judge.phone,
-                "\n".join(poster_assignment),
-                "\n".join(paper_assignment),
-            ]
-            judges_writer.writerow(judge_row)
+    print(f"Admitted {len(new_students)} new student(s).")
+    output(
+        judge_roster,
+        student_roster,
+        schedule_inputs=(judge_data_path, student_data_path),
+    )
+    if SEND_NOTIFICATIONS:
+        # Only the judges whose assignments changed (and the new students) get a new message
+        send_notifications(judge_roster, student_roster)
 
-    with open(
-        output_folder_path / "presentation_schedule.csv", "w", newline=""
-    ) as presentation_schedule_csv:
-        presentation_schedule_writer = csv.writer(presentation_schedule_csv)
-        presentation_schedule_writer.writerow(presentation_schedule_headers)
 
-        presentations = []
-        for student in sorted(
-            student_roster,
-            key=lambda student: student.presentation_time
-            if student.presentation_time is not None
-            else 0,
-        ):
-            if not student.is_poster:
-                continue
-            presentations.append(
-                [
-                    *index_to_datetime_str(student.presentation_time),
-                    student.student_id,
-                    student.presentation_judges[0].first,
-                    student.presentation_judges[0].last,
-                    student.presentation_judges[0].email,
-                    student.presentation_judges[0].phone,
-                ]
-            )
+def schedule_out_of_core(
+    judge_data_path, student_data_path, presentation_strategy, paper_strategy
+):
+    # Same steps as a normal run, with the rosters and assignments kept in the store
+    store = ScheduleStore(STORE_FILE)
+    try:
+        store.load(judge_data_path, student_data_path)
+        try:
+            store.schedule(presentation_strategy, paper_strategy)
+            store.verify(judge_data_path, student_data_path)
+        except (
+            PresentationAssignmentError,
+            PaperAssignmentError,
+            OutputVerificationError,
+        ) as e:
+            output(None, None, error=e.message)
+            return
+
+        # Judges are only read from the store by the calendars, the saved schedule, and the notifications
+        staging_path = stage_output(store.iter_judges(), None, tables=store.render_tables())
+        output(
+            store.iter_judges(),
+            None,
+            staging_path=staging_path,
+            schedule_inputs=(judge_data_path, student_data_path),
+        )
+        if SEND_NOTIFICATIONS:
+            send_notifications(store.iter_judges(), store.iter_students())
+    finally:
+        store.close()
 
-        presentation_schedule_writer.writerows(presentations)
 
-    print(
-        f"Scheduling successfully completed!\nOutput data can be found in {str(output_folder_path.resolve())}."
+def main():
+    parser = argparse.ArgumentParser(description="Schedule JSHS judges.")
+    parser.add_argument(
+        "--render-only",
+        nargs="*",
+        metavar="FILE",
+        help="regenerate the output files (or just the named ones) from the last saved schedule without scheduling again",
     )
+    parser.add_argument(
+        "--admit",
+        action="store_true",
+        help="give judges to students added to the student data since the last saved schedule, keeping every other assignment",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help=f"record why each assignment was made in {DECISION_TRACE_FILE} in the output folder (see decision_trace.py)",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="print how many presentations and papers have been assigned while scheduling",
+    )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help=f"keep the rosters and assignments in {STORE_FILE} instead of in memory, for inputs too large to fit",
+    )
+    parser.add_argument(
+        "--presentation-strategy",
+        choices=sorted(PRESENTATION_STRATEGIES),
+        default=PRESENTATION_STRATEGY,
+        help=f"how presentations are assigned to judges (default: {PRESENTATION_STRATEGY})",
+    )
+    parser.add_argument(
+        "--paper-strategy",
+        choices=sorted(PAPER_STRATEGIES),
+        default=PAPER_STRATEGY,
+        help=f"how papers are assigned to reviewers (default: {PAPER_STRATEGY})",
+    )
+    args = parser.parse_args()
+    # argparse only checks the choices of values given on the command line, not the defaults from config.py
+    for kind, name, strategies in (
+        ("presentation", args.presentation_strategy, PRESENTATION_STRATEGIES),
+        ("paper", args.paper_strategy, PAPER_STRATEGIES),
+    ):
+        if name not in strategies:
+            parser.error(
+                f"unknown {kind} strategy {name!r} in config.py (choose from {', '.join(sorted(strategies))})"
+            )
+    # Only needed when scheduling from scratch, since --render-only and --admit keep the saved panels
+    scheduling = args.render_only is None and not args.admit
+    if scheduling:
+        try:
+            get_presentation_strategy(args.presentation_strategy)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.out_of_core and args.progress:
+        parser.error("--progress cannot be used with --out-of-core")
+
+    recover_output()
 
-
-def main():
     input_folder_path = Path(INPUT_FOLDER_PATH)
     input_judge_data_path = input_folder_path / JUDGE_DATA
     input_student_data_path = input_folder_path / STUDENT_DATA
@@ -662,22 +869,67 @@ def main():
         output(None, None, error=error_message)
         return
 
-    judge_roster = create_judge_roster(input_judge_data_path)
-    student_roster = create_student_roster(input_student_data_path)
+    if args.render_only is not None:
+        render_only(input_judge_data_path, input_student_data_path, args.render_only)
+        return
+    if args.admit:
+        admit_new_students(input_judge_data_path, input_student_data_path)
+        return
+
+    # Every problem in the input is reported before any time is spent on scheduling
+    try:
+        validate_input(input_judge_data_path, input_student_data_path)
+    except InputValidationError as e:
+        output(None, None, error=e.message)
+        return
+
+    if args.trace:
+        decision_trace.enable()
+    if args.out_of_core:
+        schedule_out_of_core(
+            input_judge_data_path,
+            input_student_data_path,
+            PRESENTATION_STRATEGIES[args.presentation_strategy],
+            PAPER_STRATEGIES[args.paper_strategy],
+        )
+        return
+
+    judge_roster = load_judge_roster(input_judge_data_path)
+    student_roster = load_student_roster(input_student_data_path)
+    assign = functools.partial(
+        assign_judges,
+        PRESENTATION_STRATEGIES[args.presentation_strategy],
+        PAPER_STRATEGIES[args.paper_strategy],
+    )
     try:
-        assign_presentations(judge_roster, student_roster)
-    except PresentationAssignmentError as e:
+        if args.progress:
+            print_progress(
+                stream_assignments(assign, judge_roster, student_roster), student_roster
+            )
+        else:
+            assign(judge_roster, student_roster)
+    except (PresentationAssignmentError, PaperAssignmentError) as e:
         output(None, None, error=e.message)
         return
-    assign_papers(judge_roster, student_roster)
+
     try:
         verify_output(
-            input_judge_data_path, input_student_data_path, judge_roster, student_roster
+            input_judge_data_path,
+            input_student_data_path,
+            judge_roster,
+            student_roster,
         )
     except OutputVerificationError as e:
         output(None, None, error=e.message)
         return
-    output(judge_roster, student_roster)
+    # The output is written to a staging folder, which only replaces the output folder once it is complete
+    output(
+        judge_roster,
+        student_roster,
+        schedule_inputs=(input_judge_data_path, input_student_data_path),
+    )
+    if SEND_NOTIFICATIONS:
+        send_notifications(judge_roster, student_roster)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,293 @@
+"""Mail-merge notifications for judges and students.
+
+Messages are rendered from the assignment data and sent through the configured SMTP
+server by a small pool of persistent connections. Sends are batched, rate limited,
+and recorded in a sent log so that an interrupted run can be resumed safely.
+
+Every message is marked as pending in the sent log before it is handed to the SMTP
+server and as sent (or failed) afterwards. When a run is resumed, sent messages are
+skipped, failed messages are retried, and messages that were still pending when the
+previous run stopped are skipped and reported, since there is no way to tell whether
+the server accepted them. The same goes for a message whose connection drops while it
+is being sent: it is left pending and reported instead of being sent again. This means
+that no message is ever sent twice.
+
+The sent log key of a message includes a digest of its text, so a judge or student
+whose assignments change (for example with "main.py --admit") is sent the new ones.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import smtplib
+from email.message import EmailMessage
+
+from util import index_to_datetime_str
+from config import (
+    CATEGORY_NUMBERS_TO_LABELS,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USE_STARTTLS,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    MAIL_FROM,
+    MAIL_CONNECTIONS,
+    MAIL_BATCH_SIZE,
+    MAIL_MAX_PER_SECOND,
+    SENT_LOG_FILE,
+)
+
+
+class SentLog:
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    def __init__(self, log_filename):
+        # Replay the log so that each message key maps to its most recent state
+        self.states = {}  # dict of str to str
+        if os.path.exists(log_filename):
+            with open(log_filename, encoding="utf-8") as log_file:
+                for line in log_file:
+                    state, _, key = line.rstrip("\n").partition(" ")
+                    if key:
+                        self.states[key] = state
+        self._log_file = open(log_filename, "a", encoding="utf-8")
+
+    def should_send(self, key):
+        return self.states.get(key, self.FAILED) == self.FAILED
+
+    def record(self, state, keys):
+        for key in keys:
+            self.states[key] = state
+            self._log_file.write(f"{state} {key}\n")
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+
+    def close(self):
+        self._log_file.close()
+
+
+class _RateLimiter:
+    def __init__(self, max_per_second):
+        self.interval = 1 / max_per_second if max_per_second else 0
+        self.next_send_time = 0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            if self.next_send_time > now:
+                await asyncio.sleep(self.next_send_time - now)
+            self.next_send_time = max(now, self.next_send_time) + self.interval
+
+
+def judge_messages(judge_roster):
+    # Yields (sent log key, message) for every judge with at least one assignment
+    for judge in judge_roster:
+        if not (judge.assigned_presentations or judge.assigned_papers) or not judge.email:
+            continue
+
+        lines = [f"Dear {judge.first} {judge.last},", ""]
+        lines.append("Thank you for volunteering to judge at JSHS. Your assignments are below.")
+        if judge.assigned_presentations:
+            lines += ["", "Poster presentations:"]
+            for student in sorted(
+                judge.assigned_presentations,
+                key=lambda student: student.presentation_time,
+            ):
+                poster_date, poster_time = index_to_datetime_str(student.presentation_time)
+                lines.append(
+                    f"- Student {student.student_id}: {poster_date} {poster_time} (poster: {student.poster_pdf})"
+                )
+        if judge.assigned_papers:
+            lines += ["", "Papers to review:"]
+            for student in sorted(
+                judge.assigned_papers, key=lambda student: student.student_id
+            ):
+                lines.append(
+                    f"- Student {student.student_id} (paper: {student.full_paper_pdf})"
+                )
+
+        message = EmailMessage()
+        message["From"] = MAIL_FROM
+        message["To"] = judge.email
+        message["Subject"] = "Your JSHS judging assignments"
+        message.set_content("\n".join(lines) + "\n")
+        yield _message_key(f"judge:{judge.judge_id}", message), message
+
+
+def student_messages(student_roster):
+    # Yields (sent log key, message) for every student with an email address on file
+    for student in student_roster:
+        if not student.email:
+            continue
+
+        lines = [
+            f"Submission number: {student.student_id}",
+            f"Category: {CATEGORY_NUMBERS_TO_LABELS[student.category]}",
+        ]
+        if student.is_paper:
+            lines.append(
+                f"Paper judges: {', '.join(str(judge) for judge in student.paper_judges)}"
+            )
+        if student.is_poster:
+            poster_date, poster_time = index_to_datetime_str(student.presentation_time)
+            lines.append(
+                f"Poster judges: {', '.join(str(judge) for judge in student.presentation_judges)}"
+            )
+            lines.append(f"Poster presentation: {poster_date} {poster_time}")
+
+        message = EmailMessage()
+        message["From"] = MAIL_FROM
+        message["To"] = student.email
+        message["Subject"] = f"Your JSHS schedule (submission {student.student_id})"
+        message.set_content("\n".join(lines) + "\n")
+        yield _message_key(f"student:{student.student_id}", message), message
+
+
+def _message_key(recipient_key, message):
+    # A message with different text (such as new assignments) gets a key of its own
+    digest = hashlib.blake2b(
+        message.get_content().encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return f"{recipient_key}:{digest}"
+
+
+def _connect():
+    connection = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    if SMTP_USE_STARTTLS:
+        connection.starttls()
+    if SMTP_USERNAME:
+        connection.login(SMTP_USERNAME, SMTP_PASSWORD)
+    return connection
+
+
+def _open_connection(connection):
+    # Returns a connection that is still open, replacing it if it has been dropped.
+    # This is only safe before a message is sent over it.
+    if connection is not None:
+        try:
+            connection.noop()
+            return connection
+        except (smtplib.SMTPException, OSError):
+            pass
+    return _connect()
+
+
+async def _send_batches(batches, sent_log, rate_limiter, summary):
+    # Each worker keeps one SMTP connection open for every batch it sends
+    loop = asyncio.get_running_loop()
+    connection = None
+    try:
+        while True:
+            batch = await batches.get()
+            if batch is None:
+                return
+
+            sent_log.record(SentLog.PENDING, [key for key, _ in batch])
+            sent_keys, failed_keys = [], []
+            for key, message in batch:
+                await rate_limiter.wait()
+                try:
+                    connection = await loop.run_in_executor(
+                        None, _open_connection, connection
+                    )
+                except (smtplib.SMTPException, OSError):
+                    # Nothing was sent, so the message can be retried by the next run
+                    failed_keys.append(key)
+                    connection = None
+                    continue
+                try:
+                    await loop.run_in_executor(None, connection.send_message, message)
+                except (
+                    smtplib.SMTPRecipientsRefused,
+                    smtplib.SMTPSenderRefused,
+                    smtplib.SMTPDataError,
+                ):
+                    # The server refused the message
+                    failed_keys.append(key)
+                    continue
+                except (smtplib.SMTPException, OSError):
+                    # The connection failed while the message was being sent, possibly
+                    # after the server accepted it, so it is left pending
+                    summary["unconfirmed"].append(key)
+                    connection = None
+                    continue
+                sent_keys.append(key)
+            sent_log.record(SentLog.SENT, sent_keys)
+            sent_log.record(SentLog.FAILED, failed_keys)
+            summary["sent"] += len(sent_keys)
+            summary["failed"] += len(failed_keys)
+    finally:
+        if connection is not None:
+            try:
+                await loop.run_in_executor(None, connection.quit)
+            except (smtplib.SMTPException, OSError):
+                pass
+
+
+async def dispatch(messages, sent_log_filename=SENT_LOG_FILE):
+    # Sends every (sent log key, message) pair that has not already been sent and
+    # returns a summary of what happened to each message
+    sent_log = SentLog(sent_log_filename)
+    summary = {"sent": 0, "failed": 0, "skipped": 0, "unconfirmed": []}
+    batches = asyncio.Queue(maxsize=2 * MAIL_CONNECTIONS)
+    rate_limiter = _RateLimiter(MAIL_MAX_PER_SECOND)
+    workers = [
+        asyncio.ensure_future(_send_batches(batches, sent_log, rate_limiter, summary))
+        for _ in range(MAIL_CONNECTIONS)
+    ]
+
+    try:
+        batch = []
+        for key, message in messages:
+            if not sent_log.should_send(key):
+                if sent_log.states[key] == SentLog.PENDING:
+                    summary["unconfirmed"].append(key)
+                else:
+                    summary["skipped"] += 1
+                continue
+            batch.append((key, message))
+            if len(batch) >= MAIL_BATCH_SIZE:
+                _raise_worker_errors(workers)
+                await batches.put(batch)
+                batch = []
+        if batch:
+            await batches.put(batch)
+        for _ in workers:
+            await batches.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        sent_log.close()
+
+    return summary
+
+
+def _raise_worker_errors(workers):
+    # Surfaces an unexpected worker error instead of waiting forever on a full queue
+    for worker in workers:
+        if worker.done():
+            worker.result()
+
+
+def send_notifications(judge_roster, student_roster):
+    messages = itertools.chain(
+        judge_messages(judge_roster), student_messages(student_roster)
+    )
+    summary = asyncio.run(dispatch(messages))
+    print(
+        f"Notifications: {summary['sent']} sent, {summary['failed']} failed, "
+        f"{summary['skipped']} already sent in a previous run."
+    )
+    if summary["failed"]:
+        print("Failed notifications will be retried the next time the program is run.")
+    if summary["unconfirmed"]:
+        print(
+            "The following notifications were interrupted while being sent (in this run or a previous one) "
+            f"and were not sent again (check {SENT_LOG_FILE} and send them by hand if needed):\n"
+            + "\n".join(summary["unconfirmed"])
+        )
@@ -0,0 +1,202 @@
+"""Row rendering for each of the output files.
+
+Every table is produced as a header row plus a generator of rows, so the writers in
+main.py can stream them to disk in whichever formats are enabled.
+"""
+
+from util import index_to_datetime_str
+from config import CATEGORY_NUMBERS_TO_LABELS, JUDGES_PER_POSTER
+
+
+STUDENT_HEADERS = [
+    "Submission Number",
+    "Oral/Paper",
+    "Poster",
+    "Category",
+    "Paper Judge 1",
+    "Paper Judge 2",
+    *(f"Poster Judge {number}" for number in range(1, JUDGES_PER_POSTER + 1)),
+    "Poster Date",
+    "Poster Time",
+]
+PAPER_JUDGES_HEADERS = [
+    "First Name",
+    "Last Name",
+    "Email",
+    "Phone",
+    "Assigned Student Number",
+    "Paper PDF",
+]
+POSTER_JUDGES_HEADERS = [
+    "First Name",
+    "Last Name",
+    "Email",
+    "Phone",
+    "Assigned Student Number",
+    "Date",
+    "Time",
+    "Poster PDF",
+]
+JUDGES_HEADERS = [
+    "First Name",
+    "Last Name",
+    "Email",
+    "Phone",
+    "Poster Assignments",
+    "Paper Assignments",
+]
+PRESENTATION_SCHEDULE_HEADERS = [
+    "Date",
+    "Time",
+    "Student Number",
+    *(
+        f"Judge {number} {detail}"
+        for number in range(1, JUDGES_PER_POSTER + 1)
+        for detail in ("First Name", "Last Name", "Email", "Phone")
+    ),
+]
+
+
+def student_rows(student_roster):
+    for student in student_roster:
+        poster_date, poster_time = "", ""
+        if student.is_poster:
+            poster_date, poster_time = index_to_datetime_str(student.presentation_time)
+        yield [
+            student.student_id,
+            "Yes" if student.is_paper else "No",
+            "Yes" if student.is_poster else "No",
+            CATEGORY_NUMBERS_TO_LABELS[student.category],
+            student.paper_judges[0] if student.is_paper else "",
+            student.paper_judges[1] if student.is_paper else "",
+            *(
+                student.presentation_judges[number]
+                if number < len(student.presentation_judges)
+                else ""
+                for number in range(JUDGES_PER_POSTER)
+            ),
+            poster_date,
+            poster_time,
+        ]
+
+
+def paper_judge_rows(judge_roster):
+    for judge in judge_roster:
+        if not judge.is_paper_reviewer:
+            continue
+        for student in judge.assigned_papers:
+            yield [
+                judge.first,
+                judge.last,
+                judge.email,
+                judge.phone,
+                student.student_id,
+                student.full_paper_pdf,
+            ]
+
+
+def poster_judge_rows(judge_roster, presorted=False):
+    # presorted means that the judges are already in order of their names
+    if not presorted:
+        judge_roster = sorted(judge_roster, key=lambda judge: (judge.first, judge.last))
+    for judge in judge_roster:
+        if not judge.presentation_availability:
+            continue
+
+        for student in sorted(
+            judge.assigned_presentations,
+            key=lambda student: student.presentation_time,
+        ):
+            poster_date, poster_time = index_to_datetime_str(student.presentation_time)
+            yield [
+                judge.first,
+                judge.last,
+                judge.email,
+                judge.phone,
+                student.student_id,
+                poster_date,
+                poster_time,
+                student.poster_pdf,
+            ]
+
+
+def judge_rows(judge_roster, presorted=False):
+    # presorted means that the judges are already in order of their names
+    if not presorted:
+        judge_roster = sorted(judge_roster, key=lambda judge: (judge.first, judge.last))
+    for judge in judge_roster:
+        poster_assignment = []
+        paper_assignment = []
+        for student in sorted(
+            judge.assigned_presentations,
+            key=lambda student: student.presentation_time,
+        ):
+            poster_date, poster_time = index_to_datetime_str(student.presentation_time)
+            poster_assignment.append(
+                f"Student {student.student_id}: {poster_date} {poster_time}"
+            )
+
+        for student in sorted(
+            judge.assigned_papers, key=lambda student: student.student_id
+        ):
+            paper_assignment.append(f"Student {student.student_id}")
+
+        yield [
+            judge.first,
+            judge.last,
+            judge.email,
+            judge.phone,
+            "\n".join(poster_assignment),
+            "\n".join(paper_assignment),
+        ]
+
+
+def presentation_schedule_rows(student_roster, presorted=False):
+    # presorted means that the students are already in order of their presentation times
+    if not presorted:
+        student_roster = sorted(
+            student_roster,
+            key=lambda student: student.presentation_time
+            if student.presentation_time is not None
+            else 0,
+        )
+    for student in student_roster:
+        if not student.is_poster:
+            continue
+        yield [
+            *index_to_datetime_str(student.presentation_time),
+            student.student_id,
+            *(
+                detail
+                for judge in student.presentation_judges[:JUDGES_PER_POSTER]
+                for detail in (judge.first, judge.last, judge.email, judge.phone)
+            ),
+        ]
+
+
+# Output file name, headers, and row generator for each output table, in the order they are written
+OUTPUT_TABLES = (
+    ("students.csv", STUDENT_HEADERS, lambda judges, students: student_rows(students)),
+    (
+        "paper_judges.csv",
+        PAPER_JUDGES_HEADERS,
+        lambda judges, students: paper_judge_rows(judges),
+    ),
+    (
+        "poster_judges.csv",
+        POSTER_JUDGES_HEADERS,
+        lambda judges, students: poster_judge_rows(judges),
+    ),
+    ("judges.csv", JUDGES_HEADERS, lambda judges, students: judge_rows(judges)),
+    (
+        "presentation_schedule.csv",
+        PRESENTATION_SCHEDULE_HEADERS,
+        lambda judges, students: presentation_schedule_rows(students),
+    ),
+)
+
+
+def render_tables(judge_roster, student_roster):
+    # Yields (output file name, headers, row generator) for each output table
+    for file_name, headers, rows in OUTPUT_TABLES:
+        yield file_name, headers, rows(judge_roster, student_roster)
@@ -0,0 +1,157 @@
+"""Memory-mapped access to input CSV rows by byte offset.
+
+Only the columns needed for scheduling are parsed up front. Every other column
+(contact details, PDF links) is re-read from the mapped file on demand using the
+byte offset of the row it came from.
+"""
+
+import csv
+import mmap
+
+
+class CsvRowStore:
+    def __init__(self, csv_filename):
+        self.csv_filename = csv_filename  # str or Path
+        with open(csv_filename, "rb") as csvfile:
+            try:
+                self.buffer = mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be memory-mapped
+                self.buffer = b""
+
+        position = [0]
+        try:
+            self.header = next(csv.reader(_decoded_lines(self.buffer, 0, position)))
+        except StopIteration:
+            self.header = []
+        self.data_offset = position[0]  # byte offset of the first data row
+        self.column_indices = {
+            column_name: index for index, column_name in enumerate(self.header)
+        }
+
+    def iter_rows(self, start=None, end=None):
+        # Yields (byte offset, row dict) for every data row between the given offsets,
+        # with the same row dicts that csv.DictReader would produce
+        if start is None:
+            start = self.data_offset
+        position = [start]
+        csvreader = csv.reader(_decoded_lines(self.buffer, start, position, end))
+        while True:
+            offset = position[0]
+            try:
+                values = next(csvreader)
+            except StopIteration:
+                return
+            if not values:
+                continue
+            yield offset, self._row_dict(values)
+
+    def chunk_boundaries(self, count):
+        # Byte offsets that split the data rows into at most count chunks of about the
+        # same size, for iter_rows(start, end). Every boundary is the start of a record:
+        # a newline only ends a record if the quotes before it are balanced, since
+        # quoted cells can span several lines ("" inside a quoted cell keeps the balance).
+        boundaries = [self.data_offset]
+        end = len(self.buffer)
+        chunk_size = (end - self.data_offset) // max(count, 1)
+        scanned = self.data_offset
+        quotes = 0
+        for number in range(1, count):
+            offset = max(self.data_offset + number * chunk_size, scanned)
+            while offset < end:
+                line_end = self.buffer.find(b"\n", offset)
+                if line_end == -1:
+                    offset = end
+                    break
+                quotes += self.buffer[scanned:line_end].count(b'"')
+                scanned = offset = line_end + 1
+                if quotes % 2 == 0:
+                    break
+            if offset >= end:
+                break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+        boundaries.append(end)
+        return boundaries
+
+    def read_row(self, offset):
+        return self._row_dict(self._read_values(offset))
+
+    def _read_values(self, offset):
+        return next(csv.reader(_decoded_lines(self.buffer, offset, [offset])))
+
+    def _row_dict(self, values):
+        # Missing trailing values become None, like csv.DictReader
+        if len(values) < len(self.header):
+            values = values + [None] * (len(self.header) - len(values))
+        return dict(zip(self.header, values))
+
+    def __reduce__(self):
+        # The mapping itself cannot be pickled, so reopen the file on the receiving side
+        return (CsvRowStore, (self.csv_filename,))
+
+    def __deepcopy__(self, memo):
+        # The store is read-only, so copies can share it
+        return self
+
+
+class LazyRow:
+    """Reference to a single row of a CsvRowStore."""
+
+    __slots__ = ("store", "offset")
+
+    def __init__(self, store, offset):
+        self.store = store  # CsvRowStore
+        self.offset = offset  # int
+
+    def read(self):
+        return self.store.read_row(self.offset)
+
+
+class LazyField:
+    """Attribute that falls back to reading its column through the object's row_ref.
+
+    The first lazy read parses the row once for every LazyField of the object and keeps
+    the values as plain attributes. The row_ref is then dropped, so the input file is
+    unmapped once no object needs it any more.
+    """
+
+    def __init__(self, column_name):
+        self.column_name = column_name
+
+    def __set_name__(self, owner, name):
+        self.attribute_name = f"_{name}"
+        owner._lazy_fields = getattr(owner, "_lazy_fields", ()) + (self,)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        # Plain attributes rather than instance.__dict__, which would make CPython give
+        # up its compact storage of every other attribute of the object
+        value = getattr(instance, self.attribute_name)
+        if value is None and instance.row_ref is not None:
+            row = instance.row_ref.read()
+            for field in type(instance)._lazy_fields:
+                if getattr(instance, field.attribute_name) is None:
+                    setattr(instance, field.attribute_name, row.get(field.column_name))
+            instance.row_ref = None
+            value = getattr(instance, self.attribute_name)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.attribute_name, value)
+
+
+def _decoded_lines(buffer, offset, position, end=None):
+    # Yields the lines of buffer starting at offset. position[0] is kept just past the
+    # last line handed out, so once csv.reader returns a record it holds the offset of
+    # the next record (csv.reader never reads ahead of the record it is parsing).
+    if end is None:
+        end = len(buffer)
+    while offset < end:
+        line_end = buffer.find(b"\n", offset, end)
+        line_end = end if line_end == -1 else line_end + 1
+        line = buffer[offset:line_end]
+        offset = line_end
+        position[0] = offset
+        yield line.decode("utf-8").replace("\r\n", "\n")
@@ -0,0 +1,279 @@
+"""What-if scenario engine for categories that cannot be fully scheduled.
+
+The rosters are parsed once and handed to a pool of worker processes (copy-on-write
+where the platform supports forking). Each worker evaluates candidate edits (moving
+students between categories, adding categories to judges, and extending judge
+availability) by rerunning the assignment on its own copy of the rosters. Feasible
+scenarios are ranked by fewest edits and then by how evenly the judges' workload is
+spread.
+
+Run this file directly to get suggestions for the current input files.
+"""
+
+import copy
+import multiprocessing
+import statistics
+from collections import namedtuple
+from pathlib import Path
+
+from main import assign_judges
+from strategies import PAPER_STRATEGIES, get_presentation_strategy
+from ingest import load_judge_roster, load_student_roster
+from ledger import reset_default_ledger
+from util import (
+    PresentationAssignmentError,
+    PaperAssignmentError,
+    index_to_datetime_str,
+)
+from config import (
+    JudgeColumnNames,
+    CATEGORY_NUMBERS_TO_LABELS,
+    STUDENT_CATEGORIES,
+    INPUT_FOLDER_PATH,
+    JUDGE_DATA,
+    STUDENT_DATA,
+    START_TIME,
+    END_TIME,
+    PRESENTATION_STRATEGY,
+    PAPER_STRATEGY,
+    JUDGES_PER_POSTER,
+)
+
+
+# Candidate edits
+MoveStudent = namedtuple("MoveStudent", ["student_id", "category"])
+AddJudgeCategory = namedtuple("AddJudgeCategory", ["judge_id", "category"])
+ExtendAvailability = namedtuple("ExtendAvailability", ["judge_id", "time_indices"])
+
+ScenarioResult = namedtuple(
+    "ScenarioResult",
+    [
+        "edits",  # tuple of edits
+        "feasible",  # bool
+        "unassigned",  # int, number of students left without all of their judges
+        "load_spread",  # int, difference between the busiest and least busy judge
+        "load_deviation",  # float, standard deviation of the judges' workload
+        "short_category",  # int, the category that failed, or None if feasible
+        "short_kind",  # "presentation" or "paper", or None if feasible
+    ],
+)
+
+# Base rosters for the worker processes, set by _init_worker
+_base_rosters = None
+
+
+def apply_edits(edits, judge_roster, student_roster):
+    judges_by_id = {judge.judge_id: judge for judge in judge_roster}
+    students_by_id = {student.student_id: student for student in student_roster}
+    for edit in edits:
+        if isinstance(edit, MoveStudent):
+            students_by_id[edit.student_id].category = edit.category
+        elif isinstance(edit, AddJudgeCategory):
+            judges_by_id[edit.judge_id].preferred_categories.append(edit.category)
+        elif isinstance(edit, ExtendAvailability):
+            judge = judges_by_id[edit.judge_id]
+            judge.presentation_availability.extend(edit.time_indices)
+            judge.presentation_slots += len(edit.time_indices)
+
+
+def evaluate_scenario(edits, judge_roster, student_roster):
+    # Works on its own copy of the rosters, so the rosters that are passed in are never modified.
+    # The copies are recorded in a ledger of their own, which is dropped with them.
+    reset_default_ledger()
+    judge_roster, student_roster = copy.deepcopy((judge_roster, student_roster))
+    apply_edits(edits, judge_roster, student_roster)
+
+    short_category, short_kind = None, None
+    try:
+        # The same strategies as main.py, so that feasible scenarios can be scheduled by it
+        assign_judges(
+            get_presentation_strategy(PRESENTATION_STRATEGY),
+            PAPER_STRATEGIES[PAPER_STRATEGY],
+            judge_roster,
+            student_roster,
+        )
+    except PresentationAssignmentError as e:
+        short_category, short_kind = e.category, "presentation"
+    except PaperAssignmentError as e:
+        short_category, short_kind = e.category, "paper"
+
+    unassigned = sum(
+        (student.is_poster and len(student.presentation_judges) < JUDGES_PER_POSTER)
+        + (student.is_paper and len(student.paper_judges) < 2)
+        for student in student_roster
+    )
+    loads = [
+        len(judge.assigned_presentations) + len(judge.assigned_papers)
+        for judge in judge_roster
+        if judge.presentation_availability or judge.is_paper_reviewer
+    ] or [0]
+    return ScenarioResult(
+        edits=tuple(edits),
+        feasible=short_category is None,
+        unassigned=unassigned,
+        load_spread=max(loads) - min(loads),
+        load_deviation=statistics.pstdev(loads),
+        short_category=short_category,
+        short_kind=short_kind,
+    )
+
+
+def _init_worker(judge_roster, student_roster):
+    global _base_rosters
+    _base_rosters = (judge_roster, student_roster)
+
+
+def _evaluate_in_worker(edits):
+    return evaluate_scenario(edits, *_base_rosters)
+
+
+def candidate_edits(result, judge_roster, student_roster, max_per_kind=10):
+    # Single edits that could help the category that a scenario came up short on
+    cat = result.short_category
+    applied = set(result.edits)
+    moved_student_ids = {
+        edit.student_id for edit in result.edits if isinstance(edit, MoveStudent)
+    }
+    judges = [judge for judge in judge_roster if cat not in judge.preferred_categories]
+    edits = []
+
+    if result.short_kind == "presentation":
+        helpers = [judge for judge in judges if judge.presentation_availability]
+        # Poster-only students are moved first, since moving them leaves paper assignments alone
+        movable_students = sorted(
+            (
+                student
+                for student in student_roster
+                if student.is_poster
+                and student.category == cat
+                and student.student_id not in moved_student_ids
+            ),
+            key=lambda student: student.is_paper,
+        )
+        # Judges who already cover the category can be asked to stay for another hour
+        for judge in [judge for judge in judge_roster if cat in judge.preferred_categories][
+            :max_per_kind
+        ]:
+            extra_hour = _next_free_hour(judge)
+            if extra_hour is not None:
+                edits.append(ExtendAvailability(judge.judge_id, extra_hour))
+    else:
+        helpers = [judge for judge in judges if judge.is_paper_reviewer]
+        movable_students = [
+            student
+            for student in student_roster
+            if student.is_paper
+            and student.category == cat
+            and student.student_id not in moved_student_ids
+        ]
+
+    # Judges who cover the fewest categories are the least likely to be busy elsewhere
+    helpers.sort(key=lambda judge: len(judge.preferred_categories))
+    for judge in helpers[:max_per_kind]:
+        edits.append(AddJudgeCategory(judge.judge_id, cat))
+
+    if movable_students:
+        for other_cat in STUDENT_CATEGORIES.values():
+            if other_cat != cat:
+                edits.append(MoveStudent(movable_students[0].student_id, other_cat))
+
+    return [edit for edit in edits if edit not in applied]
+
+
+def _next_free_hour(judge):
+    # Earliest hour of the event that the judge has not marked as available
+    availability = set(judge.presentation_availability)
+    days = len(JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES)
+    for index in range(days * (END_TIME - START_TIME)):
+        if index not in availability:
+            return (index, index + 0.5)
+    return None
+
+
+def find_feasible_scenarios(
+    judge_roster, student_roster, max_edits=3, beam_width=8, limit=10, processes=None
+):
+    # Breadth-first search over combinations of edits. After each level, only the
+    # beam_width most promising infeasible scenarios (fewest unassigned students) are extended.
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+
+    feasible = []
+    with context.Pool(
+        processes, initializer=_init_worker, initargs=(judge_roster, student_roster)
+    ) as pool:
+        base_result = pool.apply(_evaluate_in_worker, ((),))
+        if base_result.feasible:
+            return [base_result]
+
+        frontier = [base_result]
+        seen = set()
+        for _ in range(max_edits):
+            scenarios = []
+            for result in frontier:
+                for edit in candidate_edits(result, judge_roster, student_roster):
+                    edits = result.edits + (edit,)
+                    key = frozenset(edits)
+                    if key not in seen:
+                        seen.add(key)
+                        scenarios.append(edits)
+            if not scenarios:
+                break
+
+            results = pool.map(_evaluate_in_worker, scenarios)
+            feasible += [result for result in results if result.feasible]
+            if len(feasible) >= limit:
+                break
+            frontier = sorted(
+                (result for result in results if not result.feasible),
+                key=lambda result: result.unassigned,
+            )[:beam_width]
+
+    feasible.sort(
+        key=lambda result: (len(result.edits), result.load_spread, result.load_deviation)
+    )
+    return feasible[:limit]
+
+
+def describe_edit(edit, judge_roster, student_roster):
+    if isinstance(edit, MoveStudent):
+        return f"Move student {edit.student_id} to {CATEGORY_NUMBERS_TO_LABELS[edit.category]}"
+    judge = next(judge for judge in judge_roster if judge.judge_id == edit.judge_id)
+    if isinstance(edit, AddJudgeCategory):
+        return f"Add {CATEGORY_NUMBERS_TO_LABELS[edit.category]} to {judge}'s categories"
+    start_date, start_time = index_to_datetime_str(edit.time_indices[0])
+    return f"Ask {judge} to also be available on {start_date} at {start_time} for an hour"
+
+
+def main():
+    try:
+        get_presentation_strategy(PRESENTATION_STRATEGY)
+    except ValueError as e:
+        print(f"[Error]\n{e}")
+        return
+
+    input_folder_path = Path(INPUT_FOLDER_PATH)
+    judge_roster = load_judge_roster(input_folder_path / JUDGE_DATA)
+    student_roster = load_student_roster(input_folder_path / STUDENT_DATA)
+
+    results = find_feasible_scenarios(judge_roster, student_roster)
+    if results and not results[0].edits:
+        print("The current input can already be scheduled without any changes.")
+        return
+    if not results:
+        print("No combination of the candidate changes made the input schedulable.")
+        return
+
+    for number, result in enumerate(results, start=1):
+        print(
+            f"Option {number} ({len(result.edits)} change(s), "
+            f"workload difference between busiest and least busy judge: {result.load_spread}):"
+        )
+        for edit in result.edits:
+            print(f"  - {describe_edit(edit, judge_roster, student_roster)}")
+
+
+if __name__ == "__main__":
+    main()
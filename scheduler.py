@@ -0,0 +1,129 @@
+"""In-memory API for the scheduling pipeline.
+
+schedule() takes judge and student records as row mappings (keyed by the column names
+in config.py) or as already-built Judge/Student objects, runs the same assignment and
+verification steps as main.py (with the strategies chosen in config.py, unless others
+are named), and returns an immutable ScheduleResult. Nothing is read from or written
+to disk.
+
+    result = schedule(judge_rows, student_rows)
+    for row in result.tables["judges.csv"].rows:
+        ...
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+
+from judge import Judge
+from student import Student
+from ingest import judge_from_row, student_from_row
+from main import assign_judges, verify_rows
+from strategies import PAPER_STRATEGIES, get_presentation_strategy
+from render import render_tables
+from ledger import AssignmentLedger
+from util import PresentationAssignmentError, PaperAssignmentError, OutputVerificationError
+from config import PRESENTATION_STRATEGY, PAPER_STRATEGY
+
+
+Table = namedtuple("Table", ["headers", "rows"])
+
+ScheduleResult = namedtuple(
+    "ScheduleResult",
+    [
+        "judges",  # tuple of Judge
+        "students",  # tuple of Student
+        "presentations",  # tuple of (judge ID, student ID, time index)
+        "papers",  # tuple of (judge ID, student ID)
+        "tables",  # read-only mapping of output file name to Table, with every cell as a string
+    ],
+)
+
+
+def schedule(
+    judges, students, presentation_strategy=PRESENTATION_STRATEGY, paper_strategy=PAPER_STRATEGY
+):
+    # Raises the same PresentationAssignmentError, PaperAssignmentError, and
+    # OutputVerificationError exceptions as the command line pipeline, or ValueError if
+    # the presentation strategy does not give every poster JUDGES_PER_POSTER judges
+    assign_presentations = get_presentation_strategy(presentation_strategy)
+    judge_rows, judge_row_ids, judge_roster = _build_roster(judges, Judge, judge_from_row)
+    student_rows, student_row_ids, student_roster = _build_roster(
+        students, Student, student_from_row
+    )
+    # Every call records its assignments in a ledger of its own
+    ledger = AssignmentLedger()
+    for entity in judge_roster + student_roster:
+        ledger.bind(entity)
+
+    checkpoint = ledger.checkpoint()
+    try:
+        assign_judges(
+            assign_presentations, PAPER_STRATEGIES[paper_strategy], judge_roster, student_roster
+        )
+        # Only records that were passed in as rows have something to be checked against
+        verify_rows(
+            judge_rows,
+            student_rows,
+            [judge for judge in judge_roster if judge.judge_id in judge_row_ids],
+            [student for student in student_roster if student.student_id in student_row_ids],
+        )
+    except (PresentationAssignmentError, PaperAssignmentError, OutputVerificationError):
+        # Judge and Student objects that were passed in are handed back without the
+        # assignments of the failed call, so they can be scheduled again
+        ledger.rollback(checkpoint)
+        raise
+
+    presentations = tuple(
+        (judge.judge_id, student.student_id, time_index)
+        for judge in judge_roster
+        for student, time_index in zip(judge.assigned_presentations, judge.assigned_times)
+    )
+    papers = tuple(
+        (judge.judge_id, student.student_id)
+        for judge in judge_roster
+        for student in judge.assigned_papers
+    )
+    tables = MappingProxyType(
+        {
+            file_name: Table(
+                tuple(headers),
+                tuple(tuple(_cell_string(value) for value in row) for row in rows),
+            )
+            for file_name, headers, rows in render_tables(judge_roster, student_roster)
+        }
+    )
+    return ScheduleResult(
+        judges=tuple(judge_roster),
+        students=tuple(student_roster),
+        presentations=presentations,
+        papers=papers,
+        tables=tables,
+    )
+
+
+def _build_roster(records, record_class, from_row):
+    # Returns the input rows, the IDs of the entities built from them, and the full roster
+    source_rows = []
+    source_ids = set()
+    roster = []
+    seen_ids = set()
+    for record in records:
+        is_row = not isinstance(record, record_class)
+        if is_row and not any(record.values()):
+            continue
+        entity = from_row(record) if is_row else record
+        entity_id = entity.judge_id if record_class is Judge else entity.student_id
+        # Like the file-based pipeline, only the first record of a duplicate judge is used
+        if record_class is Judge and entity_id in seen_ids:
+            continue
+        seen_ids.add(entity_id)
+        if is_row:
+            source_rows.append(record)
+            source_ids.add(entity_id)
+        roster.append(entity)
+    return source_rows, source_ids, roster
+
+
+def _cell_string(value):
+    # Matches how csv.writer writes each value
+    return "" if value is None else str(value)
@@ -0,0 +1,499 @@
+"""Out-of-core scheduling, for inputs too large to keep in memory all at once.
+
+With "main.py --out-of-core", the rosters and the assignments are kept in an SQLite
+database (STORE_FILE) instead of in memory:
+
+- The input files are streamed into the database row by row.
+- Scheduling runs one category at a time. Only the judges and students of that
+  category (and whoever they are already assigned to) are loaded as Judge and Student
+  objects, so that the usual strategies can run on them, and the assignments they make
+  are written back before the next category is loaded.
+- The checks of verify_output are run as queries, and as one streaming pass over the
+  input files.
+- The output is written by the same row functions as in memory, from judges and
+  students loaded STORE_BATCH_SIZE at a time.
+
+Memory use depends on the size of the largest category and on the batch size, but not
+on the size of the whole input. Strategies only ever see one category at a time, so
+ignoring_category only spreads papers across the reviewers of each category.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import decision_trace
+from ingest import (
+    iter_roster_rows,
+    judge_from_row,
+    student_from_row,
+    judge_identity_key,
+    judge_id_from_identity_key,
+)
+from judge import Judge
+from student import Student
+from ledger import AssignmentLedger, PRESENTATION, PAPER
+from render import (
+    OUTPUT_TABLES,
+    student_rows,
+    paper_judge_rows,
+    poster_judge_rows,
+    judge_rows,
+    presentation_schedule_rows,
+)
+from util import OutputVerificationError
+from config import (
+    JUDGE_CATEGORIES,
+    STUDENT_CATEGORIES,
+    StudentColumnNames,
+    JUDGES_PER_POSTER,
+    STORE_BATCH_SIZE,
+)
+
+
+SCHEMA = """
+CREATE TABLE judges (
+    position INTEGER PRIMARY KEY,  -- number of the judge's row among the non-blank input rows
+    judge_id INTEGER NOT NULL UNIQUE,
+    first TEXT,
+    last TEXT,
+    email TEXT,
+    phone TEXT,
+    is_paper_reviewer INTEGER NOT NULL
+);
+CREATE TABLE judge_categories (judge_id INTEGER NOT NULL, category INTEGER NOT NULL);
+CREATE INDEX judge_categories_by_category ON judge_categories (category);
+CREATE INDEX judge_categories_by_judge ON judge_categories (judge_id);
+CREATE TABLE judge_availability (judge_id INTEGER NOT NULL, time_index REAL NOT NULL);
+CREATE INDEX judge_availability_by_judge ON judge_availability (judge_id, time_index);
+CREATE TABLE students (
+    position INTEGER PRIMARY KEY,  -- number of the student's row among the input rows
+    student_id INTEGER NOT NULL UNIQUE,
+    is_paper INTEGER NOT NULL,
+    is_poster INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    poster_pdf TEXT,
+    full_paper_pdf TEXT,
+    email TEXT
+);
+CREATE INDEX students_by_category ON students (category);
+CREATE TABLE assignments (
+    position INTEGER PRIMARY KEY,  -- order the assignments were made in
+    judge_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    kind INTEGER NOT NULL,  -- ledger.PRESENTATION or ledger.PAPER
+    time_index REAL  -- NULL for papers
+);
+CREATE INDEX assignments_by_judge ON assignments (judge_id);
+CREATE INDEX assignments_by_student ON assignments (student_id, kind);
+
+-- The judges and students that are loaded into memory. The core ones are being worked
+-- on, and the others are only loaded because they are assigned to a core one.
+CREATE TEMP TABLE working_judges (judge_id INTEGER PRIMARY KEY, core INTEGER NOT NULL);
+CREATE TEMP TABLE working_students (student_id INTEGER PRIMARY KEY, core INTEGER NOT NULL);
+"""
+
+# Checks of the assignments, as (query for the IDs of the first few judges or students
+# that fail it, description of the problem)
+ASSIGNMENT_CHECKS = (
+    (
+        f"""SELECT s.student_id FROM students s
+        LEFT JOIN assignments a ON a.student_id = s.student_id AND a.kind = {PRESENTATION}
+        WHERE s.is_poster GROUP BY s.student_id HAVING COUNT(a.judge_id) != {JUDGES_PER_POSTER}""",
+        f"Input students were not assigned {JUDGES_PER_POSTER} poster judge(s), even though they are poster presenters.",
+    ),
+    (
+        f"""SELECT s.student_id FROM students s
+        LEFT JOIN assignments a ON a.student_id = s.student_id AND a.kind = {PAPER}
+        WHERE s.is_paper GROUP BY s.student_id
+        HAVING COUNT(a.judge_id) != 2 OR COUNT(DISTINCT a.judge_id) != 2""",
+        "Input students were not assigned 2 different paper judges, even though they are oral/paper presenters.",
+    ),
+    (
+        f"""SELECT DISTINCT s.student_id FROM assignments a JOIN students s USING (student_id)
+        WHERE (a.kind = {PRESENTATION} AND NOT s.is_poster) OR (a.kind = {PAPER} AND NOT s.is_paper)""",
+        "Input students were assigned judges for a presentation or paper that they did not submit.",
+    ),
+    (
+        f"""SELECT student_id FROM assignments WHERE kind = {PRESENTATION}
+        GROUP BY student_id HAVING COUNT(DISTINCT time_index) > 1 OR COUNT(DISTINCT judge_id) != COUNT(*)""",
+        "Input students' poster judges do not evaluate their presentation together at one time.",
+    ),
+)
+JUDGE_CHECKS = (
+    (
+        f"""SELECT DISTINCT a.judge_id FROM assignments a WHERE a.kind = {PRESENTATION}
+        AND NOT EXISTS (
+            SELECT 1 FROM judge_availability v
+            WHERE v.judge_id = a.judge_id AND v.time_index = a.time_index
+        )""",
+        "Input judges were assigned presentations at times when they are not available.",
+    ),
+    (
+        f"""SELECT judge_id FROM assignments WHERE kind = {PRESENTATION}
+        GROUP BY judge_id, time_index HAVING COUNT(*) > 1""",
+        "Input judges were assigned more than one presentation at the same time.",
+    ),
+    (
+        """SELECT DISTINCT a.judge_id FROM assignments a JOIN students s USING (student_id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM judge_categories c
+            WHERE c.judge_id = a.judge_id AND c.category = s.category
+        )""",
+        "Input judges were assigned students from categories that they did not choose.",
+    ),
+    (
+        f"""SELECT DISTINCT a.judge_id FROM assignments a JOIN judges j USING (judge_id)
+        WHERE a.kind = {PAPER} AND NOT j.is_paper_reviewer""",
+        "Input judges who are not paper reviewers were assigned papers.",
+    ),
+)
+
+
+class ScheduleStore:
+    def __init__(self, store_filename):
+        # Every run starts with a new store
+        Path(store_filename).unlink(missing_ok=True)
+        self.connection = sqlite3.connect(store_filename)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def load(self, judge_data_path, student_data_path):
+        # Streams the input files into the store
+        with self.connection:
+            for position, row in enumerate(_nonblank_rows(judge_data_path)):
+                judge = judge_from_row(row)
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO judges VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        position,
+                        judge.judge_id,
+                        judge.first,
+                        judge.last,
+                        judge.email,
+                        judge.phone,
+                        judge.is_paper_reviewer,
+                    ),
+                )
+                # Only the first record of a judge who filled in the form more than once is used
+                if not cursor.rowcount:
+                    continue
+                self.connection.executemany(
+                    "INSERT INTO judge_categories VALUES (?, ?)",
+                    ((judge.judge_id, category) for category in judge.preferred_categories),
+                )
+                self.connection.executemany(
+                    "INSERT INTO judge_availability VALUES (?, ?)",
+                    (
+                        (judge.judge_id, time_index)
+                        for time_index in judge.presentation_availability
+                    ),
+                )
+
+            for position, row in enumerate(iter_roster_rows(student_data_path)):
+                student = student_from_row(row)
+                self.connection.execute(
+                    "INSERT INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        position,
+                        student.student_id,
+                        student.is_paper,
+                        student.is_poster,
+                        student.category,
+                        student.poster_pdf,
+                        student.full_paper_pdf,
+                        student.email,
+                    ),
+                )
+
+    def category_order(self, kind):
+        # Categories in the order that the strategies take them in, starting with the one
+        # with the fewest judges who evaluate presentations (or review papers)
+        if kind == PRESENTATION:
+            condition = "EXISTS (SELECT 1 FROM judge_availability v WHERE v.judge_id = j.judge_id)"
+        else:
+            condition = "j.is_paper_reviewer"
+        judge_counts = dict(
+            self.connection.execute(
+                f"""SELECT c.category, COUNT(*) FROM judge_categories c JOIN judges j USING (judge_id)
+                WHERE {condition} GROUP BY c.category"""
+            )
+        )
+        return sorted(
+            dict.fromkeys(JUDGE_CATEGORIES.values()),
+            key=lambda category: judge_counts.get(category, 0),
+        )
+
+    def schedule(self, presentation_strategy, paper_strategy):
+        for kind, strategy in ((PRESENTATION, presentation_strategy), (PAPER, paper_strategy)):
+            if kind == PAPER and decision_trace.active:
+                # Reasons set by the presentation strategy do not apply to the paper strategy
+                decision_trace.active.set_context(0)
+            for category in self.category_order(kind):
+                self.schedule_category(strategy, category)
+
+    def schedule_category(self, strategy, category):
+        # Runs the strategy on the judges and students of one category, and saves the
+        # assignments that it makes
+        self._select_working_set(
+            [
+                judge_id
+                for judge_id, in self.connection.execute(
+                    "SELECT judge_id FROM judge_categories WHERE category = ?", (category,)
+                )
+            ],
+            [
+                student_id
+                for student_id, in self.connection.execute(
+                    "SELECT student_id FROM students WHERE category = ?", (category,)
+                )
+            ],
+        )
+        ledger = AssignmentLedger()
+        judges, students = self._load_working_set(ledger)
+        checkpoint = ledger.checkpoint()
+        strategy(judges, students)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO assignments (judge_id, student_id, kind, time_index) VALUES (?, ?, ?, ?)",
+                (
+                    (judge.judge_id, student.student_id, kind, time_index)
+                    for judge, student, kind, time_index in ledger.records(checkpoint)
+                ),
+            )
+
+    def iter_judges(self, by_name=False):
+        # Yields every judge with their assignments, in roster order or by name. Only
+        # one of iter_judges and iter_students can be in use at a time.
+        order = "first, last, position" if by_name else "position"
+        cursor = self.connection.execute(f"SELECT judge_id FROM judges ORDER BY {order}")
+        while True:
+            judge_ids = [judge_id for judge_id, in cursor.fetchmany(STORE_BATCH_SIZE)]
+            if not judge_ids:
+                return
+            self._select_working_set(judge_ids, [])
+            judges, _ = self._load_working_set(AssignmentLedger())
+            judges_by_id = {judge.judge_id: judge for judge in judges}
+            for judge_id in judge_ids:
+                yield judges_by_id[judge_id]
+
+    def iter_students(self, by_presentation_time=False):
+        # Yields every student with their assignments, in roster order or by presentation time
+        if by_presentation_time:
+            order = f"""COALESCE((
+                SELECT MAX(a.time_index) FROM assignments a
+                WHERE a.student_id = s.student_id AND a.kind = {PRESENTATION}
+            ), 0), position"""
+        else:
+            order = "position"
+        cursor = self.connection.execute(f"SELECT student_id FROM students s ORDER BY {order}")
+        while True:
+            student_ids = [student_id for student_id, in cursor.fetchmany(STORE_BATCH_SIZE)]
+            if not student_ids:
+                return
+            self._select_working_set([], student_ids)
+            _, students = self._load_working_set(AssignmentLedger())
+            students_by_id = {student.student_id: student for student in students}
+            for student_id in student_ids:
+                yield students_by_id[student_id]
+
+    def render_tables(self):
+        # Like render.render_tables, with the rows streamed from the store
+        rows = {
+            "students.csv": lambda: student_rows(self.iter_students()),
+            "paper_judges.csv": lambda: paper_judge_rows(self.iter_judges()),
+            "poster_judges.csv": lambda: poster_judge_rows(
+                self.iter_judges(by_name=True), presorted=True
+            ),
+            "judges.csv": lambda: judge_rows(self.iter_judges(by_name=True), presorted=True),
+            "presentation_schedule.csv": lambda: presentation_schedule_rows(
+                self.iter_students(by_presentation_time=True), presorted=True
+            ),
+        }
+        for file_name, headers, _ in OUTPUT_TABLES:
+            yield file_name, headers, rows[file_name]()
+
+    def verify(self, judge_data_path, student_data_path):
+        # The checks of verify_output: the stored rosters are compared with the input
+        # files one row at a time, and the assignments are checked with queries
+        judge_count = 0
+        for position, row in enumerate(_nonblank_rows(judge_data_path)):
+            judge_id = judge_id_from_identity_key(judge_identity_key(row))
+            stored = self.connection.execute(
+                "SELECT position, first, last, email, phone, is_paper_reviewer FROM judges WHERE judge_id = ?",
+                (judge_id,),
+            ).fetchone()
+            if stored is not None and stored[0] != position:
+                # A later record of a judge who filled in the form more than once
+                continue
+            expected = judge_from_row(row)
+            if stored is None or stored[1:] != (
+                expected.first,
+                expected.last,
+                expected.email,
+                expected.phone,
+                expected.is_paper_reviewer,
+            ) or self._judge_lists(judge_id) != (
+                expected.preferred_categories,
+                expected.presentation_availability,
+            ):
+                error_message = (
+                    "For a given input judge, the details of the judge in the output do not match.\n"
+                    "Input judge's name and contact details:\n"
+                    f"First name: {expected.first}, last name: {expected.last}, email: {expected.email}, phone number: {expected.phone}."
+                )
+                raise OutputVerificationError(error_message)
+            judge_count += 1
+
+        student_count = 0
+        for position, row in enumerate(iter_roster_rows(student_data_path)):
+            student_id = int(row[StudentColumnNames.SUBMISSION_NUMBER])
+            stored = self.connection.execute(
+                "SELECT position, is_paper, is_poster, category FROM students WHERE student_id = ?",
+                (student_id,),
+            ).fetchone()
+            participation_type = row[StudentColumnNames.PARTICIPATION_TYPE]
+            if stored != (
+                position,
+                "Oral" in participation_type,
+                "Poster" in participation_type,
+                STUDENT_CATEGORIES[row[StudentColumnNames.CATEGORY]],
+            ):
+                error_message = (
+                    "For a given input student, the details of the student in the output do not match.\n"
+                    f"Input student's submission number: {student_id}\n"
+                )
+                raise OutputVerificationError(error_message)
+            student_count += 1
+
+        stored_counts = self.connection.execute(
+            "SELECT (SELECT COUNT(*) FROM judges), (SELECT COUNT(*) FROM students)"
+        ).fetchone()
+        if stored_counts != (judge_count, student_count):
+            error_message = (
+                f"The output has {stored_counts[0]} judge(s) and {stored_counts[1]} student(s), "
+                f"but the input has {judge_count} judge(s) and {student_count} student(s).\n"
+            )
+            raise OutputVerificationError(error_message)
+
+        for checks, kind in ((ASSIGNMENT_CHECKS, "submission numbers"), (JUDGE_CHECKS, "judge IDs")):
+            for query, problem in checks:
+                ids = [str(id_) for id_, in self.connection.execute(f"{query} LIMIT 10")]
+                if ids:
+                    error_message = f"{problem}\nFirst {kind} with this problem: {', '.join(ids)}\n"
+                    raise OutputVerificationError(error_message)
+
+    def _judge_lists(self, judge_id):
+        # (preferred categories, presentation availability) of a stored judge
+        return (
+            [
+                category
+                for category, in self.connection.execute(
+                    "SELECT category FROM judge_categories WHERE judge_id = ? ORDER BY rowid",
+                    (judge_id,),
+                )
+            ],
+            [
+                time_index
+                for time_index, in self.connection.execute(
+                    "SELECT time_index FROM judge_availability WHERE judge_id = ? ORDER BY rowid",
+                    (judge_id,),
+                )
+            ],
+        )
+
+    def _select_working_set(self, judge_ids, student_ids):
+        # Makes the given judges and students the core of the working set, along with
+        # everyone they are assigned to, so that all of their assignments can be loaded
+        with self.connection:
+            self.connection.execute("DELETE FROM working_judges")
+            self.connection.execute("DELETE FROM working_students")
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO working_judges VALUES (?, 1)",
+                ((judge_id,) for judge_id in judge_ids),
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO working_students VALUES (?, 1)",
+                ((student_id,) for student_id in student_ids),
+            )
+            self.connection.execute(
+                """INSERT OR IGNORE INTO working_students
+                SELECT a.student_id, 0 FROM assignments a JOIN working_judges w USING (judge_id)"""
+            )
+            self.connection.execute(
+                """INSERT OR IGNORE INTO working_judges
+                SELECT a.judge_id, 0 FROM assignments a JOIN working_students w USING (student_id)"""
+            )
+
+    def _load_working_set(self, ledger):
+        # Loads the working set into the ledger and returns its core judges and
+        # students, in roster order
+        preferred_categories = {}
+        for judge_id, category in self.connection.execute(
+            """SELECT judge_id, category FROM judge_categories
+            JOIN working_judges USING (judge_id) ORDER BY judge_categories.rowid"""
+        ):
+            preferred_categories.setdefault(judge_id, []).append(category)
+        presentation_availability = {}
+        for judge_id, time_index in self.connection.execute(
+            """SELECT judge_id, time_index FROM judge_availability
+            JOIN working_judges USING (judge_id) ORDER BY judge_availability.rowid"""
+        ):
+            presentation_availability.setdefault(judge_id, []).append(time_index)
+
+        judges_by_id = {}
+        core_judges = []
+        for judge_id, first, last, email, phone, is_paper_reviewer, core in self.connection.execute(
+            """SELECT judge_id, first, last, email, phone, is_paper_reviewer, core FROM judges
+            JOIN working_judges USING (judge_id) ORDER BY position"""
+        ):
+            judge = Judge(
+                judge_id=judge_id,
+                first=first,
+                last=last,
+                email=email,
+                phone=phone,
+                preferred_categories=preferred_categories.get(judge_id, []),
+                is_paper_reviewer=bool(is_paper_reviewer),
+                presentation_availability=presentation_availability.get(judge_id, []),
+                ledger=ledger,
+            )
+            judges_by_id[judge_id] = judge
+            if core:
+                core_judges.append(judge)
+
+        students_by_id = {}
+        core_students = []
+        for student_id, is_paper, is_poster, category, poster_pdf, full_paper_pdf, email, core in self.connection.execute(
+            """SELECT student_id, is_paper, is_poster, category, poster_pdf, full_paper_pdf, email, core
+            FROM students JOIN working_students USING (student_id) ORDER BY position"""
+        ):
+            student = Student(
+                student_id=student_id,
+                is_paper=bool(is_paper),
+                is_poster=bool(is_poster),
+                category=category,
+                poster_pdf=poster_pdf,
+                full_paper_pdf=full_paper_pdf,
+                email=email,
+                ledger=ledger,
+            )
+            students_by_id[student_id] = student
+            if core:
+                core_students.append(student)
+
+        for judge_id, student_id, kind, time_index in self.connection.execute(
+            """SELECT a.judge_id, a.student_id, a.kind, a.time_index FROM assignments a
+            JOIN working_judges USING (judge_id) JOIN working_students USING (student_id)
+            ORDER BY a.position"""
+        ):
+            ledger.record(judges_by_id[judge_id], students_by_id[student_id], kind, time_index)
+        return core_judges, core_students
+
+
+def _nonblank_rows(path):
+    # Blank judge rows are skipped, as when the roster is read into memory
+    for row in iter_roster_rows(path):
+        if any(row.values()):
+            yield row
@@ -0,0 +1,101 @@
+"""Registry of the available presentation and paper assignment strategies.
+
+Every strategy is a function that takes (judge_roster, student_roster), assigns judges
+in place, and raises PresentationAssignmentError or PaperAssignmentError if some
+category cannot be fully scheduled. Strategies register themselves by name with the
+decorators below. The bundled ones live in main.py and appendix.py, which main.py
+imports so that they are all registered.
+
+Presentation strategies also register how many judges they give every poster. The
+output files and their checks expect JUDGES_PER_POSTER judges, so only the strategies
+that give that many can be used.
+"""
+
+from util import PresentationAssignmentError
+from config import (
+    JUDGE_CATEGORIES,
+    STUDENT_CATEGORIES,
+    CATEGORY_NUMBERS_TO_LABELS,
+    JUDGES_PER_POSTER,
+)
+
+PRESENTATION_STRATEGIES = {}
+PAPER_STRATEGIES = {}
+# Number of judges that each presentation strategy gives every poster, or None if it
+# gives every poster JUDGES_PER_POSTER judges
+PANEL_SIZES = {}
+
+
+def register_presentation_strategy(name, panel_size=1):
+    def register(strategy):
+        PRESENTATION_STRATEGIES[name] = strategy
+        PANEL_SIZES[name] = panel_size
+        return strategy
+
+    return register
+
+
+def register_paper_strategy(name):
+    def register(strategy):
+        PAPER_STRATEGIES[name] = strategy
+        return strategy
+
+    return register
+
+
+def usable_presentation_strategies():
+    # Names of the presentation strategies that give every poster JUDGES_PER_POSTER judges
+    return sorted(
+        name
+        for name, panel_size in PANEL_SIZES.items()
+        if panel_size is None or panel_size == JUDGES_PER_POSTER
+    )
+
+
+def get_presentation_strategy(name):
+    # Raises ValueError if there is no such strategy, or if it cannot be used with JUDGES_PER_POSTER
+    if name not in PRESENTATION_STRATEGIES:
+        raise ValueError(
+            f"unknown presentation strategy {name!r} (choose from {', '.join(sorted(PRESENTATION_STRATEGIES))})"
+        )
+    if name not in usable_presentation_strategies():
+        raise ValueError(
+            f"the {name} presentation strategy gives every poster {PANEL_SIZES[name]} judge(s), "
+            f"but JUDGES_PER_POSTER is {JUDGES_PER_POSTER} in config.py "
+            f"(choose from {', '.join(usable_presentation_strategies())})"
+        )
+    return PRESENTATION_STRATEGIES[name]
+
+
+def group_posters_by_category(judge_roster, student_roster):
+    # Returns the poster presenters and the judges who evaluate presentations, by category
+    students_by_cat = {
+        cat: [
+            student
+            for student in student_roster
+            if student.is_poster and student.category == cat
+        ]
+        for cat in STUDENT_CATEGORIES.values()
+    }
+
+    category_judges = {category: [] for category in JUDGE_CATEGORIES.values()}
+    for judge in judge_roster:
+        # Filter out judges who only review papers
+        if not judge.presentation_slots:
+            continue
+        for category in judge.preferred_categories:
+            category_judges[category].append(judge)
+    return students_by_cat, category_judges
+
+
+def presentation_shortage_error(cat, student_count, judge_count, judges_per_poster=1):
+    # Error for a category whose presentations could not all be given judges
+    error_message = (
+        f"The category {CATEGORY_NUMBERS_TO_LABELS[cat]} did not have enough judges to evaluate all presentations.\n"
+        "Either assign more judges to this category or transfer some students out of this category.\n"
+        f"There are {student_count} student(s) in this category who are presenting posters and {judge_count} "
+        "judge(s) who have submitted availability to evaluate poster presentations"
+    )
+    if judges_per_poster > 1:
+        error_message += f", but every presentation needs {judges_per_poster} judges at the same time"
+    return PresentationAssignmentError(error_message + ".\n", category=cat)
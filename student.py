@@ -1,4 +1,15 @@
+from config import StudentColumnNames
+from ledger import AssignmentList, default_ledger
+from row_store import LazyField
+
+
 class Student:
+    # PDF links are only needed for output, so they can be read lazily from the input file
+    poster_pdf = LazyField(StudentColumnNames.POSTER_PDF_UPLOAD)
+    full_paper_pdf = LazyField(StudentColumnNames.PAPER_PDF_UPLOAD)
+    # Only used for notifications, and the column may be missing entirely
+    email = LazyField(StudentColumnNames.EMAIL)
+
     def __init__(
         self,
         student_id,
@@ -7,18 +18,39 @@ class Student:
         category,
         poster_pdf,
         full_paper_pdf,
+        email=None,
+        row_ref=None,
+        ledger=None,
     ):
         self.student_id = student_id  # int
         self.is_paper = is_paper  # bool
         self.is_poster = is_poster  # bool
         self.category = category  # int
 
-        self.paper_judges = []  # list of Judge
-        self.presentation_judges = []  # list of Judge
+        # Assignments are recorded in the ledger, which keeps these up to date
+        self.ledger = ledger if ledger is not None else default_ledger()  # AssignmentLedger
+        self.paper_judges = AssignmentList()  # list of Judge
+        self.presentation_judges = AssignmentList()  # list of Judge
         self.presentation_time = None  # float
 
-        self.poster_pdf = poster_pdf
-        self.full_paper_pdf = full_paper_pdf
+        self.row_ref = row_ref  # LazyRow, or None if every field was passed in
+        self.poster_pdf = poster_pdf  # str, or None to read it from row_ref
+        self.full_paper_pdf = full_paper_pdf  # str, or None to read it from row_ref
+        self.email = email  # str, or None to read it from row_ref
+
+    def __getstate__(self):
+        # Assignments stay behind in the ledger, so copies start without any
+        state = self.__dict__.copy()
+        for name in ("ledger", "paper_judges", "presentation_judges"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ledger = default_ledger()
+        self.paper_judges = AssignmentList()
+        self.presentation_judges = AssignmentList()
+        self.presentation_time = None
 
     def __eq__(self, other):
         return self.student_id == other.student_id
@@ -13,8 +13,15 @@ from config import (
 
 
 class PresentationAssignmentError(Exception):
-    def __init__(self, message):
+    def __init__(self, message, category=None):
+        self.message = message
+        self.category = category  # int, the category that could not be scheduled
+
+
+class PaperAssignmentError(Exception):
+    def __init__(self, message, category=None):
         self.message = message
+        self.category = category  # int, the category that could not be scheduled
 
 
 class OutputVerificationError(Exception):
@@ -22,17 +29,27 @@ class OutputVerificationError(Exception):
         self.message = message
 
 
+class ScheduleArtifactError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class InputValidationError(Exception):
+    def __init__(self, message, problems=None):
+        self.message = message
+        self.problems = problems or []  # list of str, one for each problem found
+
+
 def time_slot_to_time(time_slot_name):
     # 11:00 am - 12:00 pm
     pattern = r"\s*(\d{1,2}):\d{2}\s*([ap])m\s*"  # Minutes are not captured, but minutes are not assumed to be "00"
-    hour, am_pm = re.search(pattern, time_slot_name).group(1, 2)
-    hour = int(hour)
+    match = re.search(pattern, time_slot_name)
+    if match is None or not 1 <= int(match.group(1)) <= 12:
+        raise ValueError(f'"{time_slot_name.strip()}" is not a time slot like "11:00 am - 12:00 pm"')
+    hour, am_pm = match.group(1, 2)
+    hour = int(hour) % 12
     if am_pm == "p":
-        if hour != 12:
-            hour += 12
-    else:
-        # TODO: remove assert
-        assert am_pm == "a"
+        hour += 12
     return hour
 
 
@@ -0,0 +1,152 @@
+"""Checks of the input data, run before anything is scheduled.
+
+Both inputs are read in a single streaming pass. Every problem found is collected
+instead of stopping at the first one, so that they can all be fixed before the next
+run. Rows are numbered as they appear in a spreadsheet, with the header as row 1, and
+also by the line of the file that they start on if that is different.
+"""
+
+import csv
+
+from ingest import roster_files
+from util import InputValidationError, time_slot_to_time, column_name_to_date
+from config import (
+    JudgeColumnNames,
+    StudentColumnNames,
+    JUDGE_CATEGORIES,
+    STUDENT_CATEGORIES,
+    START_TIME,
+    END_TIME,
+)
+
+
+REQUIRED_JUDGE_COLUMNS = (
+    JudgeColumnNames.FIRST_NAME,
+    JudgeColumnNames.LAST_NAME,
+    JudgeColumnNames.EMAIL,
+    JudgeColumnNames.PHONE,
+    JudgeColumnNames.PREFERRED_CATEGORIES,
+    JudgeColumnNames.IS_PAPER_REVIEWER,
+) + JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES
+
+# The student email column is optional
+REQUIRED_STUDENT_COLUMNS = (
+    StudentColumnNames.SUBMISSION_NUMBER,
+    StudentColumnNames.PARTICIPATION_TYPE,
+    StudentColumnNames.CATEGORY,
+    StudentColumnNames.POSTER_PDF_UPLOAD,
+    StudentColumnNames.PAPER_PDF_UPLOAD,
+)
+
+
+def missing_columns(fieldnames, required_columns):
+    return [column_name for column_name in required_columns if column_name not in fieldnames]
+
+
+def judge_row_problems(row):
+    # Blank judge rows are skipped when the roster is read, so they are not a problem
+    if not any(row.values()):
+        return []
+    problems = []
+    # Judges who left their preferred categories blank are not given anything to judge,
+    # as before, so only categories that were filled in have to be known
+    preferred_categories = row[JudgeColumnNames.PREFERRED_CATEGORIES]
+    if preferred_categories.strip() and not any(
+        category in preferred_categories for category in JUDGE_CATEGORIES
+    ):
+        problems.append(
+            f'none of the preferred categories "{preferred_categories}" is one of the judge categories in config.py'
+        )
+    for column_name in JudgeColumnNames.JUDGE_AVAILABILITY_COLUMN_NAMES:
+        for time_slot in row[column_name].split(","):
+            if not time_slot:
+                continue
+            try:
+                hour = time_slot_to_time(time_slot)
+            except ValueError as e:
+                column_date = column_name_to_date(column_name)
+                problems.append(f"{e} (availability for {column_date:%A, %B} {column_date.day})")
+                continue
+            if not START_TIME <= hour < END_TIME:
+                problems.append(
+                    f'the time slot "{time_slot.strip()}" is outside of the event hours in config.py'
+                )
+    return problems
+
+
+def student_row_problems(row):
+    if not any(row.values()):
+        return ["the row is blank, delete it"]
+    problems = []
+    if not row[StudentColumnNames.SUBMISSION_NUMBER].strip().isdigit():
+        problems.append(
+            f'the submission number "{row[StudentColumnNames.SUBMISSION_NUMBER]}" is not a number'
+        )
+    if row[StudentColumnNames.CATEGORY] not in STUDENT_CATEGORIES:
+        problems.append(
+            f'the category "{row[StudentColumnNames.CATEGORY]}" is not one of the student categories in config.py'
+        )
+    participation_type = row[StudentColumnNames.PARTICIPATION_TYPE]
+    if "Oral" not in participation_type and "Poster" not in participation_type:
+        problems.append(
+            f'the participation type "{participation_type}" is neither oral/paper nor poster'
+        )
+    return problems
+
+
+def input_problems(judge_data_path, student_data_path):
+    # Returns a description of every problem in the input, each with the file and row it is in
+    problems = []
+    for kind, path, required_columns, row_problems in (
+        ("judge", judge_data_path, REQUIRED_JUDGE_COLUMNS, judge_row_problems),
+        ("student", student_data_path, REQUIRED_STUDENT_COLUMNS, student_row_problems),
+    ):
+        first_rows = {}  # submission number -> where it was first seen
+        for csv_filename in roster_files(path):
+            with open(csv_filename, encoding="utf-8", newline="") as csvfile:
+                reader = csv.DictReader(csvfile)
+                columns = missing_columns(reader.fieldnames or [], required_columns)
+                if columns:
+                    # The rows cannot be checked without their columns
+                    problems += [
+                        f'{csv_filename.name}: the {kind} data is missing the column "{column_name}"'
+                        for column_name in columns
+                    ]
+                    continue
+
+                for row_number, row in enumerate(reader, start=2):
+                    location = f"{csv_filename.name}, row {row_number}"
+                    # A quoted cell can span several lines of the file, which moves
+                    # the row's first line away from its spreadsheet row
+                    line_number = reader.line_num - sum(
+                        value.count("\n") for value in row.values() if isinstance(value, str)
+                    )
+                    if line_number != row_number:
+                        location += f" (line {line_number} of the file)"
+                    # Cells missing from short rows are read as None
+                    row = {
+                        column_name: value or ""
+                        for column_name, value in row.items()
+                        if column_name is not None
+                    }
+                    problems += [f"{location}: {problem}" for problem in row_problems(row)]
+                    if kind != "student" or not any(row.values()):
+                        continue
+                    submission_number = row[StudentColumnNames.SUBMISSION_NUMBER].strip()
+                    if submission_number in first_rows:
+                        problems.append(
+                            f"{location}: the submission number {submission_number} is already used in {first_rows[submission_number]}"
+                        )
+                    else:
+                        first_rows[submission_number] = location
+    return problems
+
+
+def validate_input(judge_data_path, student_data_path):
+    problems = input_problems(judge_data_path, student_data_path)
+    if problems:
+        error_message = (
+            f"The input data has {len(problems)} problem(s), listed below. Fix all of them and run the scheduler again.\n"
+            + "".join(f"- {problem}\n" for problem in problems)
+        )
+        raise InputValidationError(error_message, problems=problems)
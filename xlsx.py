@@ -0,0 +1,159 @@
+"""Streaming writer for native Excel workbooks (.xlsx).
+
+Worksheet XML is written straight into the zip archive row by row, so memory use
+stays constant no matter how many rows are exported. Every cell is written as an
+inline text cell, which keeps Excel from reformatting values such as phone numbers
+and submission numbers (the same problem util.value_to_excel_csv_string works around
+for CSV files).
+"""
+
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+
+# Characters that are not allowed anywhere in an XML 1.0 document
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Characters that are not allowed in worksheet names
+_ILLEGAL_SHEET_NAME_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    "{sheet_overrides}"
+    "</Types>"
+)
+_SHEET_OVERRIDE_XML = (
+    '<Override PartName="/xl/worksheets/sheet{number}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    "<sheets>{sheets}</sheets>"
+    "</workbook>"
+)
+_WORKBOOK_SHEET_XML = '<sheet name={name} sheetId="{number}" r:id="rId{number}"/>'
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    "{relationships}"
+    "</Relationships>"
+)
+_WORKBOOK_REL_XML = (
+    '<Relationship Id="rId{number}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{number}.xml"/>'
+)
+_WORKSHEET_START_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_WORKSHEET_END_XML = "</sheetData></worksheet>"
+_CELL_XML = '<c t="inlineStr"><is><t xml:space="preserve">{}</t></is></c>'
+
+# Number of bytes buffered before they are compressed into the archive
+_BUFFER_SIZE = 1 << 16
+
+
+class XlsxWorkbook:
+    def __init__(self, xlsx_filename):
+        self._zip_file = zipfile.ZipFile(
+            xlsx_filename, "w", compression=zipfile.ZIP_DEFLATED
+        )
+        self._sheet_names = []  # list of str
+        self._open_sheet = None  # XlsxSheet
+
+    def add_sheet(self, name):
+        # Only one sheet can be written at a time, since each one is streamed into the archive
+        if self._open_sheet is not None:
+            self._open_sheet.close()
+        name = _ILLEGAL_SHEET_NAME_CHARS.sub("_", name)[:31]
+        self._sheet_names.append(name)
+        entry = self._zip_file.open(
+            f"xl/worksheets/sheet{len(self._sheet_names)}.xml", "w"
+        )
+        self._open_sheet = XlsxSheet(entry)
+        return self._open_sheet
+
+    def close(self):
+        if self._open_sheet is not None:
+            self._open_sheet.close()
+            self._open_sheet = None
+
+        numbers = range(1, len(self._sheet_names) + 1)
+        self._zip_file.writestr(
+            "[Content_Types].xml",
+            _CONTENT_TYPES_XML.format(
+                sheet_overrides="".join(
+                    _SHEET_OVERRIDE_XML.format(number=number) for number in numbers
+                )
+            ),
+        )
+        self._zip_file.writestr("_rels/.rels", _ROOT_RELS_XML)
+        self._zip_file.writestr(
+            "xl/workbook.xml",
+            _WORKBOOK_XML.format(
+                sheets="".join(
+                    _WORKBOOK_SHEET_XML.format(name=quoteattr(name), number=number)
+                    for number, name in zip(numbers, self._sheet_names)
+                )
+            ),
+        )
+        self._zip_file.writestr(
+            "xl/_rels/workbook.xml.rels",
+            _WORKBOOK_RELS_XML.format(
+                relationships="".join(
+                    _WORKBOOK_REL_XML.format(number=number) for number in numbers
+                )
+            ),
+        )
+        self._zip_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class XlsxSheet:
+    def __init__(self, entry):
+        self._stream = io.TextIOWrapper(
+            io.BufferedWriter(entry, buffer_size=_BUFFER_SIZE), encoding="utf-8"
+        )
+        self._stream.write(_WORKSHEET_START_XML)
+        self._row_number = 0  # int
+        self.closed = False  # bool
+
+    def write_row(self, row):
+        self._row_number += 1
+        cells = "".join(_cell_xml(value) for value in row)
+        self._stream.write(f'<row r="{self._row_number}">{cells}</row>')
+
+    def close(self):
+        if self.closed:
+            return
+        self._stream.write(_WORKSHEET_END_XML)
+        self._stream.close()
+        self.closed = True
+
+
+def _cell_xml(value):
+    text = "" if value is None else str(value)
+    if not text:
+        return "<c/>"
+    return _CELL_XML.format(escape(_ILLEGAL_XML_CHARS.sub("", text)))